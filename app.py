@@ -12,13 +12,24 @@ from modulos.cobranza import render_cobranza
 from modulos.gastos import render_gastos
 from modulos.ubicaciones import render_ubicaciones
 from modulos.clientes import render_clientes
+from modulos.comisiones import render_comisiones
+from modulos.auditoria import AVISO_SIN_CUENTA, bitacora_disponible, render_auditoria
+from modulos.tareas import iniciar_programador
+from modulos.desarrollos import cargar_desarrollos, leer_hoja, invalidar_cache, render_consolidado
 
 # --- CONFIGURACIÓN DE LA PÁGINA ---
-st.set_page_config(page_title="Zona Valle - Gestión Inmobiliaria", layout="wide")
+st.set_page_config(page_title="Gestión Inmobiliaria", layout="wide")
 
 # --- CONEXIÓN A GOOGLE SHEETS ---
+# Una sola conexión compartida por todas las sesiones y todos los desarrollos
 conn = st.connection("gsheets", type=GSheetsConnection)
-URL_SHEET = "https://docs.google.com/spreadsheets/d/1d_G8VafPZp5jj3c1Io9kN3mG31GE70kK2Q2blxWzCCs/"
+DESARROLLOS = cargar_desarrollos({
+    "Zona Valle": "https://docs.google.com/spreadsheets/d/1d_G8VafPZp5jj3c1Io9kN3mG31GE70kK2Q2blxWzCCs/",
+})
+
+# --- TAREAS NOCTURNAS (cartera, atrasos, respaldos) ---
+for url_desarrollo in DESARROLLOS.values():
+    iniciar_programador(conn, url_desarrollo)
 
 # --- FUNCIÓN PARA FORMATO DE MONEDA ($) ---
 def fmt_moneda(valor):
@@ -31,7 +42,7 @@ def fmt_moneda(valor):
 def cargar_datos(pestana):
     try:
         # Esto nos dirá en la pantalla de la app qué está pasando
-        df = conn.read(spreadsheet=URL_SHEET, worksheet=pestana)
+        df = leer_hoja(conn, URL_SHEET, pestana)
         if df.empty:
             st.sidebar.warning(f"La pestaña '{pestana}' está vacía o no existe.")
         return df
@@ -41,10 +52,20 @@ def cargar_datos(pestana):
 
 # === BARRA LATERAL (SIDEBAR) ===
 with st.sidebar:
+    # El desarrollo se elige por sesión; todas las lecturas y escrituras usan su libro
+    if len(DESARROLLOS) > 1:
+        st.selectbox("🏢 Desarrollo", list(DESARROLLOS), key="desarrollo")
+    elif st.session_state.get("desarrollo") not in DESARROLLOS:
+        st.session_state["desarrollo"] = next(iter(DESARROLLOS))
+    URL_SHEET = DESARROLLOS[st.session_state["desarrollo"]]
+    # Sin cliente gspread no hay bitácora y guardar_hoja rechaza toda escritura
+    if not bitacora_disponible(conn):
+        st.error(AVISO_SIN_CUENTA)
+
     try:
         st.image("logo.png", use_container_width=True)
     except:
-        st.title("🏢 Zona Valle")
+        st.title(f"🏢 {st.session_state['desarrollo']}")
     
     st.subheader("Navegación")
     menu = st.radio(
@@ -52,19 +73,25 @@ with st.sidebar:
         [
             "🏠 Inicio (Cartera)", 
             "📈 Reportes Financieros",
+            "🌐 Consolidado",
             "📝 Ventas", 
+            "💼 Comisiones",
             "📊 Detalle de Crédito", 
             "💰 Cobranza", 
             "💸 Gastos", 
             "📍 Ubicaciones", 
-            "👥 Clientes"
+            "👥 Clientes",
+            "🕵️ Bitácora"
         ]
     )
+
+    # Nombre que se registra en la bitácora de cambios
+    st.text_input("👤 Usuario", key="usuario")
     
     st.divider()
 
     if st.button("🔄 Actualizar Información", use_container_width=True):
-        st.cache_data.clear()
+        invalidar_cache(URL_SHEET)
         st.rerun()
 
     st.markdown("---")
@@ -79,7 +106,8 @@ if menu == "🏠 Inicio (Cartera)":
     df_v = cargar_datos("ventas")
     df_p = cargar_datos("pagos")
     df_cl = cargar_datos("clientes")
-    render_inicio(df_v, df_p, df_cl, fmt_moneda)
+    df_u = cargar_datos("ubicaciones")
+    render_inicio(df_v, df_p, df_cl, df_u, conn, URL_SHEET, fmt_moneda)
 
 elif menu == "📈 Reportes Financieros":
     df_v = cargar_datos("ventas")
@@ -87,6 +115,9 @@ elif menu == "📈 Reportes Financieros":
     df_g = cargar_datos("gastos")
     render_reportes(df_v, df_p, df_g, fmt_moneda)
 
+elif menu == "🌐 Consolidado":
+    render_consolidado(conn, DESARROLLOS, fmt_moneda)
+
 elif menu == "📝 Ventas":
     df_v = cargar_datos("ventas")
     df_u = cargar_datos("ubicaciones")
@@ -94,10 +125,16 @@ elif menu == "📝 Ventas":
     df_vd = cargar_datos("vendedores")
     render_ventas(df_v, df_u, df_cl, df_vd, conn, URL_SHEET, fmt_moneda)
 
+elif menu == "💼 Comisiones":
+    df_v = cargar_datos("ventas")
+    df_g = cargar_datos("gastos")
+    df_vd = cargar_datos("vendedores")
+    render_comisiones(df_v, df_g, df_vd, URL_SHEET, fmt_moneda)
+
 elif menu == "📊 Detalle de Crédito":
     df_v = cargar_datos("ventas")
     df_p = cargar_datos("pagos")
-    render_detalle_credito(df_v, df_p, fmt_moneda)
+    render_detalle_credito(df_v, df_p, URL_SHEET, fmt_moneda)
 
 elif menu == "💰 Cobranza":
     df_v = cargar_datos("ventas")
@@ -110,12 +147,15 @@ elif menu == "💸 Gastos":
 
 elif menu == "📍 Ubicaciones":
     df_u = cargar_datos("ubicaciones")
-    render_ubicaciones(df_u, conn, URL_SHEET, cargar_datos)
+    render_ubicaciones(df_u, conn, URL_SHEET, cargar_datos, fmt_moneda)
 
 elif menu == "👥 Clientes":
     df_cl = cargar_datos("clientes")
     render_clientes(df_cl, conn, URL_SHEET, cargar_datos)
 
+elif menu == "🕵️ Bitácora":
+    render_auditoria(conn, URL_SHEET, cargar_datos)
+
 
 
 
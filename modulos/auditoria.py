@@ -0,0 +1,199 @@
+import json
+from datetime import datetime
+
+import streamlit as st
+import pandas as pd
+
+from modulos.desarrollos import leer_hoja, nueva_version
+from modulos.integridad import problemas_nuevos, render_integridad
+
+HOJA_AUDITORIA = "auditoria"
+COLUMNAS_AUDITORIA = ["fecha_hora", "usuario", "hoja", "id_registro", "operacion", "campo", "antes", "despues"]
+
+# Columna identificadora de cada pestaña
+CLAVES_HOJA = {
+    "ventas": "id_venta",
+    "pagos": "id_pago",
+    "gastos": "id_gasto",
+    "clientes": "id_cliente",
+    "ubicaciones": "id_lote",
+    "vendedores": "id_vendedor",
+}
+
+
+# --- NORMALIZACIÓN DE VALORES ---
+def _texto(valor):
+    # 1500 y 1500.0 deben compararse igual; vacíos / NaN se guardan como ""
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _por_clave(df, clave):
+    if df.empty or clave not in df.columns:
+        return pd.DataFrame()
+    df = df.copy()
+    df.index = df[clave].map(_texto)
+    return df[~df.index.duplicated(keep="last")].apply(lambda col: col.map(_texto))
+
+
+# --- CÁLCULO DE DIFERENCIAS ---
+def diferencias(hoja, df_antes, df_despues):
+    # Solo se guardan los campos que cambiaron; altas y bajas llevan el registro completo en una sola fila
+    clave = CLAVES_HOJA.get(hoja)
+    a, d = _por_clave(df_antes, clave), _por_clave(df_despues, clave)
+    registros = []
+
+    for id_reg in d.index.difference(a.index):
+        registros.append((id_reg, "alta", "*", "", json.dumps(d.loc[id_reg].to_dict(), ensure_ascii=False)))
+    for id_reg in a.index.difference(d.index):
+        registros.append((id_reg, "baja", "*", json.dumps(a.loc[id_reg].to_dict(), ensure_ascii=False), ""))
+
+    comunes = a.index.intersection(d.index)
+    if len(comunes):
+        columnas = a.columns.union(d.columns)
+        A = a.reindex(index=comunes, columns=columnas).fillna("")
+        D = d.reindex(index=comunes, columns=columnas).fillna("")
+        cambios = (A != D).stack()
+        for id_reg, campo in cambios[cambios].index:
+            registros.append((id_reg, "cambio", campo, A.at[id_reg, campo], D.at[id_reg, campo]))
+
+    ahora = datetime.now().isoformat(timespec="seconds")
+    usuario = st.session_state.get("usuario") or "sin identificar"
+    return pd.DataFrame(
+        [(ahora, usuario, hoja, *r) for r in registros], columns=COLUMNAS_AUDITORIA
+    )
+
+
+# --- ESCRITURA ---
+AVISO_SIN_CUENTA = (
+    "⚠️ Bitácora no disponible: configure una cuenta de servicio en [connections.gsheets] de secrets.toml. "
+    "Mientras tanto no se guardan cambios, porque quedarían fuera de la auditoría."
+)
+
+
+def _cliente_gspread(conn):
+    # Con cuenta de servicio el conector expone el cliente gspread: permite agregar filas sin reescribir la hoja.
+    # El conector no lo publica (atributo privado), por eso solo se accede aquí y se verifica en bitacora_disponible
+    return getattr(getattr(conn, "client", None), "_client", None)
+
+
+@st.cache_resource(show_spinner=False)
+def bitacora_disponible(_conn):
+    # Se verifica una vez por proceso (la conexión es única); si el conector cambia, falla aquí y no al guardar
+    return callable(getattr(_cliente_gspread(_conn), "open_by_url", None))
+
+
+def _hoja_gspread(conn, URL_SHEET):
+    libro = _cliente_gspread(conn).open_by_url(URL_SHEET)
+    try:
+        return libro.worksheet(HOJA_AUDITORIA)
+    except Exception:
+        hoja = libro.add_worksheet(HOJA_AUDITORIA, rows=1000, cols=len(COLUMNAS_AUDITORIA))
+        hoja.append_row(COLUMNAS_AUDITORIA)
+        return hoja
+
+
+def registrar_auditoria(conn, URL_SHEET, df_cambios):
+    if df_cambios.empty:
+        return
+    try:
+        hoja = _hoja_gspread(conn, URL_SHEET)
+        hoja.append_rows(df_cambios.astype(str).values.tolist(), value_input_option="RAW")
+    except Exception as e:
+        st.sidebar.warning(f"No se pudo registrar la auditoría: {e}")
+
+
+def guardar_hoja(conn, URL_SHEET, hoja, df_nuevo):
+    # Reemplaza a conn.update: valida referencias, escribe la pestaña y registra en la bitácora solo los campos modificados.
+    # La versión anterior se toma de la lectura en caché (no genera otra consulta a Google Sheets).
+    # Devuelve la versión de la pestaña que corresponde a lo escrito (ver desarrollos.actualizar_indice).
+    # Sin bitácora no se escribe: reescribir la pestaña de auditoría completa en cada cambio no escala
+    if not bitacora_disponible(conn):
+        st.error(AVISO_SIN_CUENTA)
+        st.stop()
+
+    df_prob = problemas_nuevos(conn, URL_SHEET, hoja, df_nuevo)
+    if not df_prob.empty:
+        st.error("❌ No se guardó: el cambio rompe referencias entre pestañas.")
+        st.dataframe(df_prob, use_container_width=True, hide_index=True)
+        st.stop()
+
+    try:
+        df_antes = leer_hoja(conn, URL_SHEET, hoja)
+    except Exception:
+        df_antes = pd.DataFrame()
+    conn.update(spreadsheet=URL_SHEET, worksheet=hoja, data=df_nuevo)
+    version = nueva_version(URL_SHEET, hoja)
+    registrar_auditoria(conn, URL_SHEET, diferencias(hoja, df_antes, df_nuevo))
+    return version
+
+
+# --- RECONSTRUCCIÓN A UNA FECHA ---
+def reconstruir_hoja(df_actual, df_log, hoja, fecha_hora):
+    # Parte del estado actual y deshace, del más reciente al más antiguo, los cambios posteriores a fecha_hora
+    clave = CLAVES_HOJA.get(hoja)
+    df = _por_clave(df_actual, clave)
+    posteriores = df_log[(df_log["hoja"] == hoja) & (df_log["fecha_hora"] > fecha_hora)]
+    filas = df.to_dict("index")
+
+    for e in posteriores.iloc[::-1].itertuples(index=False):
+        id_reg = _texto(e.id_registro)
+        if e.operacion == "alta":
+            filas.pop(id_reg, None)
+        elif e.operacion == "baja":
+            filas[id_reg] = json.loads(e.antes)
+        elif e.operacion == "cambio" and id_reg in filas:
+            filas[id_reg][e.campo] = _texto(e.antes)
+
+    df_res = pd.DataFrame.from_dict(filas, orient="index", columns=df.columns if not df.empty else None)
+    return df_res.reset_index(drop=True)
+
+
+# --- VISTA ---
+def render_auditoria(conn, URL_SHEET, cargar_datos):
+    st.title("🕵️ Bitácora de Cambios")
+    if not bitacora_disponible(conn):
+        st.error(AVISO_SIN_CUENTA)
+
+    df_log = cargar_datos(HOJA_AUDITORIA)
+    if df_log.empty:
+        st.info("Aún no hay cambios registrados.")
+        render_integridad(cargar_datos)
+        return
+    df_log = df_log.apply(lambda col: col.map(_texto))
+
+    tab_hist, tab_reconstruir, tab_integridad = st.tabs(["📋 Historial", "⏪ Reconstruir a una Fecha", "🧪 Integridad"])
+
+    with tab_hist:
+        c1, c2, c3 = st.columns(3)
+        f_hoja = c1.selectbox("Pestaña", ["Todas"] + sorted(df_log["hoja"].unique()))
+        f_oper = c2.selectbox("Operación", ["Todas", "alta", "cambio", "baja"])
+        f_id = c3.text_input("ID de registro")
+
+        df_filtro = df_log
+        if f_hoja != "Todas":
+            df_filtro = df_filtro[df_filtro["hoja"] == f_hoja]
+        if f_oper != "Todas":
+            df_filtro = df_filtro[df_filtro["operacion"] == f_oper]
+        if f_id:
+            df_filtro = df_filtro[df_filtro["id_registro"] == f_id.strip()]
+
+        st.dataframe(df_filtro.iloc[::-1], use_container_width=True, hide_index=True)
+
+    with tab_reconstruir:
+        c1, c2, c3 = st.columns(3)
+        r_hoja = c1.selectbox("Pestaña a reconstruir", list(CLAVES_HOJA))
+        r_fecha = c2.date_input("Fecha", value=datetime.now())
+        r_hora = c3.time_input("Hora", value=datetime.now().time().replace(second=0, microsecond=0))
+
+        if st.button("⏪ Reconstruir"):
+            momento = datetime.combine(r_fecha, r_hora).isoformat(timespec="seconds")
+            df_hist = reconstruir_hoja(cargar_datos(r_hoja), df_log, r_hoja, momento)
+            st.caption(f"Estado de '{r_hoja}' al {momento.replace('T', ' ')}")
+            st.dataframe(df_hist, use_container_width=True, hide_index=True)
+
+    with tab_integridad:
+        render_integridad(cargar_datos)
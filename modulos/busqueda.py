@@ -0,0 +1,101 @@
+import re
+import unicodedata
+from collections import Counter
+
+import streamlit as st
+import pandas as pd
+
+from modulos.desarrollos import indice_compartido
+
+# --- NORMALIZACIÓN DE TEXTO ---
+def normalizar_texto(texto):
+    # Minúsculas, sin acentos y con espacios simples ("José  Pérez" -> "jose perez")
+    if texto is None or (isinstance(texto, float) and pd.isna(texto)):
+        return ""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", re.sub(r"[^a-z0-9@._ ]", " ", texto.lower())).strip()
+
+
+def solo_digitos(texto):
+    return re.sub(r"\D", "", "" if texto is None else str(texto))
+
+
+def trigramas(texto):
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+# --- ÍNDICE DE CLIENTES ---
+def construir_indice_clientes(df_c):
+    indice = {"registros": [], "trigramas": {}, "telefonos": {}, "correos": {}}
+    if df_c.empty or "nombre" not in df_c.columns:
+        return indice
+
+    for pos, fila in enumerate(df_c.itertuples(index=False)):
+        nombre = getattr(fila, "nombre", "")
+        telefono = solo_digitos(getattr(fila, "telefono", ""))
+        correo = normalizar_texto(getattr(fila, "correo", ""))
+        nombre_norm = normalizar_texto(nombre)
+        tris = trigramas(nombre_norm)
+
+        indice["registros"].append({
+            "nombre": nombre, "telefono": getattr(fila, "telefono", ""), "correo": getattr(fila, "correo", ""),
+            "id_cliente": getattr(fila, "id_cliente", None), "n_trigramas": len(tris),
+        })
+        for t in tris:
+            indice["trigramas"].setdefault(t, []).append(pos)
+        if len(telefono) >= 7:
+            # Se indexan los últimos 10 dígitos para ignorar lada / prefijo internacional
+            indice["telefonos"].setdefault(telefono[-10:], []).append(pos)
+        if "@" in correo:
+            indice["correos"].setdefault(correo, []).append(pos)
+    return indice
+
+
+def obtener_indice_clientes(df_c, URL_SHEET):
+    return indice_compartido("clientes", URL_SHEET, lambda: construir_indice_clientes(df_c), df_c)
+
+
+def buscar_clientes(indice, consulta, limite=20, umbral=0.3):
+    consulta_norm = normalizar_texto(consulta)
+    if not consulta_norm:
+        return []
+
+    puntajes = {}
+    # Coincidencia exacta de teléfono o correo: puntaje máximo
+    digitos = solo_digitos(consulta)
+    if len(digitos) >= 7:
+        for pos in indice["telefonos"].get(digitos[-10:], []):
+            puntajes[pos] = 1.0
+    for pos in indice["correos"].get(consulta_norm, []):
+        puntajes[pos] = 1.0
+
+    # Similitud de trigramas (coeficiente de Dice) sobre el nombre
+    tris = trigramas(consulta_norm)
+    coincidencias = Counter()
+    for t in tris:
+        coincidencias.update(indice["trigramas"].get(t, ()))
+    for pos, comunes in coincidencias.items():
+        score = 2 * comunes / (len(tris) + indice["registros"][pos]["n_trigramas"])
+        if score >= umbral:
+            puntajes[pos] = max(puntajes.get(pos, 0.0), score)
+
+    mejores = sorted(puntajes.items(), key=lambda x: -x[1])[:limite]
+    return [{**indice["registros"][pos], "score": score} for pos, score in mejores]
+
+
+def posibles_duplicados(indice, nombre, telefono="", correo="", umbral=0.75):
+    candidatos = {}
+    for criterio in [nombre, telefono, correo]:
+        if not criterio:
+            continue
+        for r in buscar_clientes(indice, criterio, limite=5, umbral=umbral):
+            if r["score"] >= umbral:
+                candidatos.setdefault(r["nombre"], r)
+    return list(candidatos.values())
+
+
+def aviso_duplicados(duplicados):
+    nombres = ", ".join(f"**{d['nombre']}**" for d in duplicados)
+    st.warning(f"⚠️ Posible cliente duplicado: {nombres}. Marque la casilla de confirmación si desea registrarlo de todas formas.")
@@ -0,0 +1,229 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime
+
+from modulos.motor_credito import terminos_credito, calcular_cuota, capital_inicial, saldo_despues_de, recargos_mora, tasa_mensual
+
+# --- CÁLCULOS DE CARTERA VECTORIZADOS ---
+# Mismas reglas que el detalle de crédito, aplicadas a todos los contratos a la vez.
+
+def _numero(serie, defecto=0.0):
+    return pd.to_numeric(serie, errors="coerce").fillna(defecto)
+
+
+def sumar_meses(fechas, meses):
+    # Equivalente vectorizado de fecha + relativedelta(months=n): el día se ajusta al fin de mes
+    fechas = pd.to_datetime(pd.Series(fechas)).reset_index(drop=True)
+    meses = pd.Series(np.asarray(meses, dtype=np.int64))
+    total = fechas.dt.year * 12 + (fechas.dt.month - 1) + meses
+    inicio_mes = pd.to_datetime(pd.DataFrame({"year": total // 12, "month": total % 12 + 1, "day": 1}))
+    dia = np.minimum(fechas.dt.day, inicio_mes.dt.days_in_month)
+    return inicio_mes + pd.to_timedelta(dia - 1, unit="D")
+
+
+def contratos_activos(df_v):
+    if "estatus_pago" in df_v.columns:
+        return df_v[df_v["estatus_pago"].fillna("Activo") == "Activo"]
+    return df_v
+
+
+def resumen_cartera(df_v, df_p, hoy=None):
+    hoy = pd.Timestamp(hoy or datetime.now())
+    res = df_v.copy()
+    if res.empty:
+        return res
+
+    if not df_p.empty and "monto" in df_p.columns:
+        abonos = df_p.assign(monto=_numero(df_p["monto"])).groupby("ubicacion")["monto"].sum()
+    else:
+        abonos = pd.Series(dtype=float)
+    res["precio_total"] = _numero(res["precio_total"])
+    res["enganche"] = _numero(res["enganche"])
+    res["mensualidad"] = _numero(res["mensualidad"])
+    res["plazo_meses"] = _numero(res["plazo_meses"], 1).astype(int)
+    res["fecha"] = pd.to_datetime(res["fecha"], errors="coerce")
+    res["abonos"] = res["ubicacion"].map(abonos).fillna(0.0)
+    for col, serie in terminos_credito(res).items():
+        res[col] = serie
+
+    res["monto_financiado"] = res["precio_total"] - res["enganche"]
+    # La mensualidad guardada manda; si falta se calcula con el motor de crédito
+    cuota_calc = calcular_cuota(
+        res["monto_financiado"], res["plazo_meses"], res["tipo_interes"], res["tasa_anual"], res["meses_gracia"], res["pago_final"]
+    )
+    # Se redondea también la guardada: contratos capturados antes con fracciones de centavo
+    res["mensualidad"] = res["mensualidad"].where(res["mensualidad"] > 0, cuota_calc).round(2)
+    # Sin interés el total es el precio pactado (la mensualidad guardada puede venir redondeada)
+    res["total_a_pagar"] = res["precio_total"].where(
+        res["tipo_interes"] == "Sin interés", res["enganche"] + res["mensualidad"] * res["plazo_meses"] + res["pago_final"]
+    )
+    res["total_pagado"] = res["enganche"] + res["abonos"]
+    res["porcentaje_pagado"] = (res["total_pagado"] / res["total_a_pagar"]).where(res["total_a_pagar"] > 0, 0.0).clip(upper=1.0)
+
+    # Las cuotas empiezan a exigirse al terminar los meses de gracia; el pago final, al terminar el plazo
+    meses_t = ((hoy.year - res["fecha"].dt.year) * 12 + (hoy.month - res["fecha"].dt.month)).fillna(0).astype(int)
+    meses_t = meses_t - res["meses_gracia"]
+    res["meses_a_deber"] = meses_t.clip(lower=0).clip(upper=res["plazo_meses"])
+    res["deuda_esperada"] = res["meses_a_deber"] * res["mensualidad"] + res["pago_final"].where(meses_t >= res["plazo_meses"], 0.0)
+    cuotas_vencidas = (res["deuda_esperada"] - res["abonos"]).clip(lower=0)
+    res["num_atrasos"] = (cuotas_vencidas / res["mensualidad"]).where(res["mensualidad"] > 0, 0.0)
+
+    # Los abonos cubren primero las cuotas exigibles, después los recargos y al final las cuotas futuras
+    res["recargos"] = _recargos_generados(res, df_p, hoy)
+    res["recargos_pagados"] = np.minimum(res["recargos"], (res["abonos"] - res["deuda_esperada"]).clip(lower=0))
+    res["recargos_pendientes"] = res["recargos"] - res["recargos_pagados"]
+    res["saldo_vencido"] = cuotas_vencidas + res["recargos_pendientes"]
+    res["saldo_restante"] = (res["total_a_pagar"] + res["recargos"] - res["total_pagado"]).clip(lower=0)
+    return res
+
+
+def _recargos_generados(res, df_p, hoy):
+    # Por cada cuota exigible: recargo_mora % de la cuota por cada mes o fracción entre su vencimiento
+    # y el pago que la terminó de cubrir (o hoy, si sigue pendiente)
+    recargos = np.zeros(len(res))
+    aplica = ((res["recargo_mora"] > 0) & (res["meses_a_deber"] > 0) & res["fecha"].notna()).to_numpy()
+    if not aplica.any():
+        return recargos
+
+    sub = res[aplica]
+    pos, n_cuota = _expandir_cuotas(sub.assign(plazo_meses=sub["meses_a_deber"]))
+    col = lambda c: sub[c].to_numpy()[pos]
+    monto = col("mensualidad") + np.where(n_cuota == col("plazo_meses"), col("pago_final"), 0.0)
+    # Centavos acumulados que deben estar pagados para cubrir cada cuota
+    objetivo = pd.Series(np.round(monto * 100).astype(np.int64)).groupby(pos).cumsum().to_numpy()
+
+    cubierta = np.full(len(pos), hoy.to_datetime64())
+    if not df_p.empty and "fecha" in df_p.columns:
+        pos_ubi = pd.Series(np.arange(len(sub)), index=sub["ubicacion"].to_numpy())
+        pagos = pd.DataFrame({
+            "pos": df_p["ubicacion"].map(pos_ubi[~pos_ubi.index.duplicated()]),
+            "fecha": pd.to_datetime(df_p["fecha"], errors="coerce"),
+            "centavos": np.round(_numero(df_p["monto"]).clip(lower=0) * 100).astype(np.int64),
+        }).dropna(subset=["pos", "fecha"]).sort_values(["pos", "fecha"])
+        if not pagos.empty:
+            # Fecha en que el acumulado de abonos alcanzó cada objetivo: searchsorted sobre claves contrato + acumulado
+            pagos["pos"] = pagos["pos"].astype(np.int64)
+            acumulado = pagos.groupby("pos")["centavos"].cumsum().to_numpy()
+            escala = int(max(acumulado.max(), objetivo.max())) + 1
+            idx = np.searchsorted(pagos["pos"].to_numpy() * escala + acumulado, pos * escala + objetivo, side="left")
+            idx_ok = np.minimum(idx, len(pagos) - 1)
+            valido = (idx < len(pagos)) & (pagos["pos"].to_numpy()[idx_ok] == pos)
+            cubierta = np.where(valido, pagos["fecha"].to_numpy()[idx_ok], cubierta)
+
+    vence = pd.DatetimeIndex(sumar_meses(col("fecha"), n_cuota + col("meses_gracia")))
+    cubierta = pd.DatetimeIndex(cubierta)
+    meses = (cubierta.year - vence.year) * 12 + (cubierta.month - vence.month) + (cubierta.day > vence.day).astype(int)
+    por_cuota = recargos_mora(monto, np.clip(np.asarray(meses), 0, None), col("recargo_mora"))
+    recargos[aplica] = np.bincount(pos, weights=por_cuota, minlength=len(sub))
+    return recargos
+
+
+def _expandir_cuotas(df_resumen):
+    # Posición del contrato y número de cuota para cada una de las cuotas de la cartera
+    plazos = df_resumen["plazo_meses"].clip(lower=0).to_numpy()
+    pos = np.repeat(np.arange(len(df_resumen)), plazos)
+    n_cuota = np.arange(len(pos)) - np.repeat(np.cumsum(plazos) - plazos, plazos) + 1
+    return pos, n_cuota
+
+
+def _cuotas(df_resumen):
+    # Una fila por cuota de cada contrato (np.repeat), sin ciclos por contrato
+    pos, n_cuota = _expandir_cuotas(df_resumen)
+    col = lambda c: df_resumen[c].to_numpy()[pos]
+    plazo, mensualidad, pago_final = col("plazo_meses"), col("mensualidad"), col("pago_final")
+    tipo, tasa, gracia = col("tipo_interes"), col("tasa_anual"), col("meses_gracia")
+
+    # El pago final se suma a la última cuota
+    monto = mensualidad + np.where(n_cuota == plazo, pago_final, 0.0)
+    # Los abonos se aplican a las cuotas en orden: cubiertas completas, una parcial y el resto pendientes
+    totales = np.bincount(pos, weights=monto, minlength=len(df_resumen))
+    acumulado = np.cumsum(monto) - np.repeat(np.cumsum(totales) - totales, df_resumen["plazo_meses"].clip(lower=0).to_numpy())
+    cubierto = col("abonos") - col("recargos_pagados") - (acumulado - monto)
+
+    args = (col("monto_financiado"), plazo, mensualidad, tipo, tasa, gracia, pago_final)
+    # Francés: interés sobre saldo insoluto; plano: siempre sobre el capital original
+    base_interes = np.where(
+        tipo == "Plano", capital_inicial(col("monto_financiado"), tipo, tasa, gracia), saldo_despues_de(n_cuota - 1, *args)
+    )
+    return pd.DataFrame({
+        "ubicacion": col("ubicacion"),
+        "n_cuota": n_cuota,
+        "fecha_pago": sumar_meses(col("fecha"), n_cuota + gracia).to_numpy(),
+        "monto_cuota": monto,
+        "interes": base_interes * tasa_mensual(tipo, tasa),
+        "cubierto": cubierto,
+        "saldo_pendiente": saldo_despues_de(n_cuota, *args),
+    })
+
+
+def tabla_amortizacion_cartera(df_resumen):
+    if not df_resumen.empty:
+        df_resumen = df_resumen.dropna(subset=["fecha"])
+    if df_resumen.empty:
+        return pd.DataFrame(columns=["ubicacion", "n_cuota", "fecha_pago", "monto_cuota", "interes", "estado", "saldo_pendiente"])
+
+    df_c = _cuotas(df_resumen)
+    df_c["estado"] = np.select(
+        [df_c["cubierto"] >= df_c["monto_cuota"] - 1e-6, df_c["cubierto"] > 1e-6],
+        ["✅ Pagado", "⚠️ Parcial"],
+        default="⏳ Pendiente",
+    )
+    return df_c[["ubicacion", "n_cuota", "fecha_pago", "monto_cuota", "interes", "estado", "saldo_pendiente"]]
+
+
+# --- FLUJO DE EFECTIVO PROYECTADO ---
+def cuotas_por_cobrar(df_resumen):
+    # Monto aún no cubierto de cada cuota
+    if not df_resumen.empty:
+        df_resumen = df_resumen.dropna(subset=["fecha"])
+    if df_resumen.empty:
+        return pd.DataFrame(columns=["ubicacion", "fecha_pago", "monto_cuota", "por_cobrar"])
+
+    df_c = _cuotas(df_resumen)
+    df_c["por_cobrar"] = np.clip(df_c["monto_cuota"] - df_c["cubierto"], 0, df_c["monto_cuota"])
+    return df_c[["ubicacion", "fecha_pago", "monto_cuota", "por_cobrar"]]
+
+
+def cuotas_cartera_activa(df_v, df_p, hoy=None):
+    # Cartera de la proyección y de la tasa histórica: ambas sobre los mismos contratos activos
+    return cuotas_por_cobrar(resumen_cartera(contratos_activos(df_v), df_p, hoy=hoy))
+
+
+def tasa_cobranza_historica(df_cuotas, df_p, hoy=None, meses=12):
+    # Cobrado / exigible de los últimos meses cerrados (entre 0 y 1).
+    # Solo cuentan los pagos de las ubicaciones de df_cuotas, para que ambos montos sean de los mismos contratos
+    hoy = pd.Timestamp(hoy or datetime.now())
+    inicio = (hoy.to_period("M") - meses).to_timestamp()
+    fin = hoy.to_period("M").to_timestamp()
+    en_rango = (df_cuotas["fecha_pago"] >= inicio) & (df_cuotas["fecha_pago"] < fin)
+    exigible = df_cuotas.loc[en_rango, "monto_cuota"].sum()
+    if exigible <= 0 or df_p.empty:
+        return None
+    if "ubicacion" in df_p.columns:
+        df_p = df_p[df_p["ubicacion"].isin(set(df_cuotas["ubicacion"]))]
+    fechas_p = pd.to_datetime(df_p["fecha"], errors="coerce")
+    cobrado = pd.to_numeric(df_p["monto"], errors="coerce").fillna(0.0)[(fechas_p >= inicio) & (fechas_p < fin)].sum()
+    return float(min(1.0, cobrado / exigible))
+
+
+def flujo_proyectado(df_cuotas, meses=12, hoy=None, incluir_atrasos=True, tasa=None):
+    # df_cuotas: cuotas_cartera_activa calculada con la misma fecha hoy
+    hoy = pd.Timestamp(hoy or datetime.now())
+    mes_actual = hoy.to_period("M")
+    periodos = pd.period_range(mes_actual, periods=meses, freq="M")
+    if df_cuotas.empty:
+        return pd.DataFrame({"mes": periodos.to_timestamp(), "programado": 0.0, "atrasos": 0.0, "esperado": 0.0, "ajustado": 0.0})
+
+    mes_cuota = df_cuotas["fecha_pago"].dt.to_period("M")
+    vencidas = mes_cuota < mes_actual
+    futuras = df_cuotas[~vencidas & mes_cuota.isin(periodos)]
+    flujo = futuras.groupby(mes_cuota[futuras.index])["por_cobrar"].sum().reindex(periodos, fill_value=0.0)
+
+    df_flujo = pd.DataFrame({"mes": periodos.to_timestamp(), "programado": flujo.to_numpy()})
+    df_flujo["atrasos"] = 0.0
+    if incluir_atrasos and len(df_flujo):
+        # Lo vencido se proyecta como cobro del mes en curso
+        df_flujo.loc[0, "atrasos"] = df_cuotas.loc[vencidas, "por_cobrar"].sum()
+    df_flujo["esperado"] = df_flujo["programado"] + df_flujo["atrasos"]
+    df_flujo["ajustado"] = df_flujo["esperado"] * (tasa if tasa is not None else 1.0)
+    return df_flujo
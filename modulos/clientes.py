@@ -1,12 +1,26 @@
 import streamlit as st
 import pandas as pd
+from modulos.auditoria import guardar_hoja
+from modulos.integridad import reservar_ids
+from modulos.busqueda import obtener_indice_clientes, buscar_clientes, posibles_duplicados, aviso_duplicados
 
 def render_clientes(df_c, conn, URL_SHEET, cargar_datos):
     st.title("👥 Gestión de Clientes")
+    indice_cli = obtener_indice_clientes(df_c, URL_SHEET)
     
     # --- VISTA GENERAL ---
     st.write("### 🔍 Directorio de Clientes")
     if not df_c.empty:
+        consulta = st.text_input("Buscar por nombre, teléfono o correo", key="buscar_cli_dir")
+        if consulta:
+            # Se conserva el orden de relevancia de la búsqueda
+            orden = {r["id_cliente"]: i for i, r in enumerate(buscar_clientes(indice_cli, consulta, limite=50))}
+            df_c_dir = df_c[df_c["id_cliente"].isin(list(orden))].sort_values(
+                "id_cliente", key=lambda s: s.map(orden), kind="stable"
+            )
+        else:
+            df_c_dir = df_c
+
         # 1. Definimos las columnas que queremos mostrar, incluyendo el ID
         columnas_visibles = ["id_cliente", "nombre", "telefono", "correo", "direccion", "notas"]
         cols_existentes = [c for c in columnas_visibles if c in df_c.columns]
@@ -22,7 +36,7 @@ def render_clientes(df_c, conn, URL_SHEET, cargar_datos):
         }
         
         # Creamos una copia filtrada y renombramos
-        df_visual = df_c[cols_existentes].copy().rename(columns=nuevos_nombres)
+        df_visual = df_c_dir[cols_existentes].copy().rename(columns=nuevos_nombres)
 
         # 3. Aplicamos Estilo (Centrado y formato de ID como entero)
         df_estilizado = df_visual.style.format({
@@ -50,27 +64,29 @@ def render_clientes(df_c, conn, URL_SHEET, cargar_datos):
             f_cor = c1.text_input("📧 Correo Electrónico")
             f_dir = c2.text_input("📍 Dirección")
             f_not = st.text_area("📝 Notas adicionales")
-            
-            nuevo_id = 1
-            if not df_c.empty and "id_cliente" in df_c.columns:
-                try:
-                    nuevo_id = int(float(df_c["id_cliente"].max())) + 1
-                except:
-                    nuevo_id = len(df_c) + 1
+            f_confirmar = st.checkbox("Registrar aunque exista un cliente similar")
             
             if st.form_submit_button("➕ REGISTRAR CLIENTE"):
+                duplicados = posibles_duplicados(indice_cli, f_nom, f_tel, f_cor) if f_nom else []
                 if not f_nom:
                     st.error("El nombre es obligatorio.")
+                elif duplicados and not f_confirmar:
+                    aviso_duplicados(duplicados)
                 else:
+                    nuevo_id = reservar_ids(conn, URL_SHEET, "clientes", df_c, "id_cliente")
                     nuevo_reg = pd.DataFrame([{"id_cliente": nuevo_id, "nombre": f_nom, "telefono": f_tel, "correo": f_cor, "direccion": f_dir, "notas": f_not}])
                     df_c = pd.concat([df_c, nuevo_reg], ignore_index=True)
-                    conn.update(spreadsheet=URL_SHEET, worksheet="clientes", data=df_c)
-                    st.success(f"✅ Cliente {f_nom} registrado."); st.cache_data.clear(); st.rerun()
+                    guardar_hoja(conn, URL_SHEET, "clientes", df_c)
+                    st.success(f"✅ Cliente {f_nom} registrado."); st.rerun()
 
     # --- PESTAÑA 2: EDITAR ---
     with tab_editar:
         if not df_c.empty:
-            cli_lista = (df_c["id_cliente"].astype(str) + " | " + df_c["nombre"]).tolist()
+            consulta_ed = st.text_input("🔍 Buscar cliente a modificar", key="buscar_cli_edit")
+            if consulta_ed:
+                cli_lista = [f"{r['id_cliente']} | {r['nombre']}" for r in buscar_clientes(indice_cli, consulta_ed)]
+            else:
+                cli_lista = (df_c["id_cliente"].astype(str) + " | " + df_c["nombre"]).tolist()
             c_sel = st.selectbox("Seleccione el cliente a modificar:", ["--"] + cli_lista)
             
             if c_sel != "--":
@@ -88,13 +104,21 @@ def render_clientes(df_c, conn, URL_SHEET, cargar_datos):
                     
                     cb1, cb2 = st.columns(2)
                     if cb1.form_submit_button("💾 GUARDAR CAMBIOS"):
+                        nombre_anterior = row["nombre"]
+                        homonimos = (df_c["nombre"] == nombre_anterior).sum() > 1
+                        if e_nom != nombre_anterior and not homonimos:
+                            # Las ventas referencian al cliente por nombre: se renombran primero para no romper la referencia
+                            df_v = cargar_datos("ventas")
+                            if "cliente" in df_v.columns and (df_v["cliente"] == nombre_anterior).any():
+                                df_v.loc[df_v["cliente"] == nombre_anterior, "cliente"] = e_nom
+                                guardar_hoja(conn, URL_SHEET, "ventas", df_v)
                         df_c.at[idx, "nombre"], df_c.at[idx, "telefono"] = e_nom, e_tel
                         df_c.at[idx, "correo"], df_c.at[idx, "direccion"] = e_cor, e_dir
                         df_c.at[idx, "notas"] = e_not
-                        conn.update(spreadsheet=URL_SHEET, worksheet="clientes", data=df_c)
-                        st.success("Actualizado."); st.cache_data.clear(); st.rerun()
+                        guardar_hoja(conn, URL_SHEET, "clientes", df_c)
+                        st.success("Actualizado."); st.rerun()
                         
                     if cb2.form_submit_button("🗑️ ELIMINAR"):
                         df_c = df_c.drop(idx)
-                        conn.update(spreadsheet=URL_SHEET, worksheet="clientes", data=df_c)
-                        st.error("Eliminado."); st.cache_data.clear(); st.rerun()
+                        guardar_hoja(conn, URL_SHEET, "clientes", df_c)
+                        st.error("Eliminado."); st.rerun()
@@ -1,11 +1,23 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from modulos.auditoria import guardar_hoja
+from modulos.desarrollos import version_de
+from modulos.integridad import reservar_ids
+from modulos.conciliacion import render_conciliacion
+from modulos.control_pagos import (
+    obtener_indice_pagos, registrar_pagos_indice, validar_pago, filtrar_pagos_nuevos, validar_importacion,
+    clave_formulario, consumir_clave
+)
 
 def render_cobranza(df_v, df_p, conn, URL_SHEET, fmt_moneda, cargar_datos):
     st.title("💰 Gestión de Cobranza")
     
-    tab_pago, tab_historial = st.tabs(["💵 Registrar Nuevo Pago", "📋 Historial y Edición"])
+    tab_pago, tab_historial, tab_importar, tab_conciliar = st.tabs(
+        ["💵 Registrar Nuevo Pago", "📋 Historial y Edición", "📥 Importar Pagos", "🏦 Conciliación Bancaria"]
+    )
+    indice_p = obtener_indice_pagos(df_p, URL_SHEET)
+    _, version_p = version_de(df_p)
 
     # ---------------------------------------------------------
     # PESTAÑA 1: REGISTRAR PAGO
@@ -36,7 +48,8 @@ def render_cobranza(df_v, df_p, conn, URL_SHEET, fmt_moneda, cargar_datos):
                 else:
                     st.success(f"✅ Al corriente. Sugerido: {fmt_moneda(monto_sug)}")
 
-                with st.form("form_nuevo_pago_modular"):
+                clave_pago = clave_formulario("nuevo_pago")
+                with st.form(f"form_nuevo_pago_{clave_pago}"):
                     c1, c2, c3 = st.columns(3)
                     f_fec = c1.date_input("Fecha", value=datetime.now())
                     f_met = c2.selectbox("Método", ["Efectivo", "Transferencia", "Depósito"])
@@ -47,20 +60,26 @@ def render_cobranza(df_v, df_p, conn, URL_SHEET, fmt_moneda, cargar_datos):
                     if col_r.form_submit_button("🔄 Actualizar"): st.rerun()
                     
                     f_com = st.text_area("Notas")
-                    if st.form_submit_button("✅ REGISTRAR PAGO", type="primary"):
-                        nid = 1
-                        if not df_p.empty and "id_pago" in df_p.columns:
-                            try: nid = int(float(df_p["id_pago"].max())) + 1
-                            except: nid = len(df_p) + 1
-                        
-                        nuevo = pd.DataFrame([{
-                            "id_pago": nid, "fecha": f_fec.strftime('%Y-%m-%d'), 
-                            "ubicacion": ubi_sel, "cliente": v['cliente'], 
-                            "monto": f_mon, "metodo": f_met, "folio": f_fol, "comentarios": f_com
-                        }])
-                        df_p = pd.concat([df_p, nuevo], ignore_index=True)
-                        conn.update(spreadsheet=URL_SHEET, worksheet="pagos", data=df_p)
-                        st.success("Pago registrado"); st.cache_data.clear(); st.rerun()
+                    f_forzar = st.checkbox("Registrar aunque coincida ubicación, fecha y monto con otro pago")
+                    enviado = st.form_submit_button("✅ REGISTRAR PAGO", type="primary")
+                    if enviado:
+                        conflictos = validar_pago(indice_p, ubi_sel, f_fec, f_mon, f_fol)
+                        if "folio" in conflictos:
+                            st.error(f"❌ {conflictos['folio']}")
+                        elif "huella" in conflictos and not f_forzar:
+                            st.error(f"❌ {conflictos['huella']}")
+                        else:
+                            # La clave se consume antes de escribir: un reenvío que llegue durante la escritura ya no la encuentra vigente
+                            consumir_clave(clave_pago)
+                            nid = reservar_ids(conn, URL_SHEET, "pagos", df_p, "id_pago")
+                            nuevo = pd.DataFrame([{
+                                "id_pago": nid, "fecha": f_fec.strftime('%Y-%m-%d'), 
+                                "ubicacion": ubi_sel, "cliente": v['cliente'], 
+                                "monto": f_mon, "metodo": f_met, "folio": f_fol, "comentarios": f_com
+                            }])
+                            df_p = pd.concat([df_p, nuevo], ignore_index=True)
+                            registrar_pagos_indice(URL_SHEET, version_p, guardar_hoja(conn, URL_SHEET, "pagos", df_p), nuevo)
+                            st.success("Pago registrado"); st.rerun()
 
     # ---------------------------------------------------------
     # PESTAÑA 2: HISTORIAL Y EDICIÓN
@@ -95,16 +114,20 @@ def render_cobranza(df_v, df_p, conn, URL_SHEET, fmt_moneda, cargar_datos):
                         
                         b1, b2 = st.columns(2)
                         if b1.form_submit_button("💾 GUARDAR CAMBIOS"):
-                            df_p.at[idx_pago, "fecha"] = e_fec.strftime('%Y-%m-%d')
-                            df_p.at[idx_pago, "metodo"], df_p.at[idx_pago, "folio"] = e_met, e_fol
-                            df_p.at[idx_pago, "monto"], df_p.at[idx_pago, "comentarios"] = e_mon, e_com
-                            conn.update(spreadsheet=URL_SHEET, worksheet="pagos", data=df_p)
-                            st.success("¡Pago actualizado!"); st.cache_data.clear(); st.rerun()
+                            conflicto_folio = validar_pago(indice_p, datos_p["ubicacion"], e_fec, e_mon, e_fol, id_excluir=datos_p["id_pago"]).get("folio")
+                            if conflicto_folio:
+                                st.error(f"❌ {conflicto_folio}")
+                            else:
+                                df_p.at[idx_pago, "fecha"] = e_fec.strftime('%Y-%m-%d')
+                                df_p.at[idx_pago, "metodo"], df_p.at[idx_pago, "folio"] = e_met, e_fol
+                                df_p.at[idx_pago, "monto"], df_p.at[idx_pago, "comentarios"] = e_mon, e_com
+                                guardar_hoja(conn, URL_SHEET, "pagos", df_p)
+                                st.success("¡Pago actualizado!"); st.rerun()
                             
                         if b2.form_submit_button("🗑️ ELIMINAR PAGO"):
                             df_p = df_p.drop(idx_pago)
-                            conn.update(spreadsheet=URL_SHEET, worksheet="pagos", data=df_p)
-                            st.error("Pago eliminado."); st.cache_data.clear(); st.rerun()
+                            guardar_hoja(conn, URL_SHEET, "pagos", df_p)
+                            st.error("Pago eliminado."); st.rerun()
 
             st.divider()
             
@@ -135,3 +158,48 @@ def render_cobranza(df_v, df_p, conn, URL_SHEET, fmt_moneda, cargar_datos):
             ])
             
             st.dataframe(df_p_estilizado, use_container_width=True, hide_index=True)
+
+    # ---------------------------------------------------------
+    # PESTAÑA 3: IMPORTACIÓN MASIVA (CSV)
+    # ---------------------------------------------------------
+    with tab_importar:
+        st.subheader("Importar Pagos desde CSV")
+        st.caption(
+            "Columnas requeridas: fecha, ubicacion, monto. Opcionales: metodo, folio, comentarios (las demás se ignoran). "
+            "Fechas en formato AAAA-MM-DD o con el día primero (DD/MM/AAAA)."
+        )
+        archivo = st.file_uploader("Archivo CSV", type=["csv"], key="csv_pagos")
+
+        if archivo is not None:
+            df_nuevos = pd.read_csv(archivo)
+            faltantes = {"fecha", "ubicacion", "monto"} - set(df_nuevos.columns)
+            if faltantes:
+                st.error(f"Faltan columnas: {', '.join(sorted(faltantes))}")
+            else:
+                ubis_contrato = df_v["ubicacion"].astype(str).str.strip() if not df_v.empty else []
+                df_validos, df_invalidos = validar_importacion(df_nuevos, ubis_contrato)
+                df_ok, df_duplicados = filtrar_pagos_nuevos(indice_p, df_validos)
+                df_rechazados = pd.concat([df_invalidos, df_duplicados], ignore_index=True)
+                c1, c2 = st.columns(2)
+                c1.metric("Pagos nuevos", len(df_ok))
+                c2.metric("Filas rechazadas", len(df_rechazados))
+                if not df_rechazados.empty:
+                    st.dataframe(df_rechazados, use_container_width=True, hide_index=True)
+
+                if not df_ok.empty and st.button("📥 IMPORTAR PAGOS NUEVOS", type="primary"):
+                    nid = reservar_ids(conn, URL_SHEET, "pagos", df_p, "id_pago", cantidad=len(df_ok))
+                    clientes_por_ubi = df_v.set_index(df_v["ubicacion"].astype(str).str.strip())["cliente"] if not df_v.empty else pd.Series(dtype=str)
+                    clientes_por_ubi = clientes_por_ubi[~clientes_por_ubi.index.duplicated()]
+                    df_ok = df_ok.assign(
+                        id_pago=range(nid, nid + len(df_ok)),
+                        cliente=df_ok["ubicacion"].map(clientes_por_ubi).fillna(""),
+                    )
+                    df_p = pd.concat([df_p, df_ok], ignore_index=True)
+                    registrar_pagos_indice(URL_SHEET, version_p, guardar_hoja(conn, URL_SHEET, "pagos", df_p), df_ok)
+                    st.success(f"{len(df_ok)} pagos importados"); st.rerun()
+
+    # ---------------------------------------------------------
+    # PESTAÑA 4: CONCILIACIÓN BANCARIA
+    # ---------------------------------------------------------
+    with tab_conciliar:
+        render_conciliacion(df_p, fmt_moneda)
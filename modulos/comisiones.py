@@ -0,0 +1,166 @@
+import re
+
+import streamlit as st
+import pandas as pd
+
+from modulos.busqueda import normalizar_texto
+from modulos.desarrollos import indice_compartido, actualizar_indice
+from modulos.tareas import resultado_tarea, ultima_ejecucion
+
+SIN_ASIGNAR = "Sin asignar"
+
+# --- LIBRO DE COMISIONES POR VENDEDOR ---
+# Se arma una vez por versión de ventas/gastos/vendedores y lo comparten todas las sesiones.
+# Cada venta o gasto nuevo se suma al acumulado al guardarse; ediciones y bajas lo reconstruyen.
+
+def _nuevo_acumulado():
+    return {"ventas": 0, "volumen": 0.0, "devengada": 0.0, "pagada": 0.0}
+
+
+def asignar_vendedor_gastos(df_com, nombres_vendedores):
+    # Gastos de comisión sin columna "vendedor": se busca el nombre del vendedor en el concepto/notas
+    vendedor = df_com["vendedor"].fillna("").astype(str).str.strip() if "vendedor" in df_com.columns else pd.Series("", index=df_com.index)
+    pendientes = vendedor == ""
+    if pendientes.any() and nombres_vendedores:
+        texto = pd.Series("", index=df_com.index)
+        for col in ["concepto", "notas"]:
+            if col in df_com.columns:
+                texto = texto + " " + df_com[col].fillna("").astype(str)
+        texto = texto.map(normalizar_texto)
+        normalizados = {normalizar_texto(n): n for n in nombres_vendedores if normalizar_texto(n)}
+        # Palabras completas ("Ana" no coincide con "Mariana"); los nombres más largos se prueban primero
+        alternativas = "|".join(re.escape(n) for n in sorted(normalizados, key=len, reverse=True))
+        encontrado = texto[pendientes].str.extract(rf"(?<![a-z0-9])({alternativas})(?![a-z0-9])", expand=False)
+        vendedor[pendientes] = encontrado.map(normalizados).fillna("")
+    return vendedor.replace("", SIN_ASIGNAR)
+
+
+def _nombres_vendedores(df_vd):
+    return df_vd["nombre"].dropna().tolist() if not df_vd.empty and "nombre" in df_vd.columns else []
+
+
+def _sumar_ventas(libro, df_v):
+    if df_v.empty or "vendedor" not in df_v.columns:
+        return
+    ventas = pd.DataFrame({
+        "vendedor": df_v["vendedor"].fillna(SIN_ASIGNAR).replace("-- SELECCIONAR --", SIN_ASIGNAR),
+        "volumen": pd.to_numeric(df_v["precio_total"], errors="coerce").fillna(0.0),
+        "devengada": pd.to_numeric(df_v["comision"], errors="coerce").fillna(0.0) if "comision" in df_v.columns else 0.0,
+    })
+    agg = ventas.groupby("vendedor").agg(ventas=("volumen", "size"), volumen=("volumen", "sum"), devengada=("devengada", "sum"))
+    for nombre, fila in agg.iterrows():
+        acum = libro.setdefault(nombre, _nuevo_acumulado())
+        acum["ventas"] += int(fila["ventas"])
+        acum["volumen"] += float(fila["volumen"])
+        acum["devengada"] += float(fila["devengada"])
+
+
+def _sumar_gastos(libro, df_g, nombres_vendedores):
+    if df_g.empty or "categoria" not in df_g.columns:
+        return
+    df_com = df_g[df_g["categoria"] == "Comisiones"]
+    if df_com.empty:
+        return
+    pagado = pd.to_numeric(df_com["monto"], errors="coerce").fillna(0.0).groupby(asignar_vendedor_gastos(df_com, nombres_vendedores)).sum()
+    for nombre, monto in pagado.items():
+        libro.setdefault(nombre, _nuevo_acumulado())["pagada"] += float(monto)
+
+
+def construir_libro_comisiones(df_v, df_g, df_vd):
+    libro = {}
+    _sumar_ventas(libro, df_v)
+    _sumar_gastos(libro, df_g, _nombres_vendedores(df_vd))
+    return libro
+
+
+def obtener_libro_comisiones(df_v, df_g, df_vd, URL_SHEET):
+    return indice_compartido("comisiones", URL_SHEET, lambda: construir_libro_comisiones(df_v, df_g, df_vd), df_v, df_g, df_vd)
+
+
+def _con_movimientos(libro, sumar):
+    # El libro compartido no se modifica (otras sesiones lo leen): se copia, es una fila por vendedor
+    nuevo = {nombre: dict(acum) for nombre, acum in libro.items()}
+    sumar(nuevo)
+    return nuevo
+
+
+def aplicar_venta(URL_SHEET, version_leida, version_escrita, df_nuevas):
+    # Llamar después de guardar ventas con las filas agregadas
+    actualizar_indice("comisiones", URL_SHEET, "ventas", version_leida, version_escrita,
+                      lambda libro: _con_movimientos(libro, lambda l: _sumar_ventas(l, df_nuevas)))
+
+
+def aplicar_gasto(URL_SHEET, version_leida, version_escrita, df_nuevos, df_vd):
+    # Llamar después de guardar gastos con las filas agregadas
+    nombres = _nombres_vendedores(df_vd)
+    actualizar_indice("comisiones", URL_SHEET, "gastos", version_leida, version_escrita,
+                      lambda libro: _con_movimientos(libro, lambda l: _sumar_gastos(l, df_nuevos, nombres)))
+
+
+def calidad_cobranza_vendedores(df_res):
+    # Contratos activos al corriente y porcentaje vencido de la cartera de cada vendedor.
+    # df_res es la cartera de contratos activos que guardan las tareas nocturnas (resultado "cartera")
+    if df_res is None or df_res.empty or "vendedor" not in df_res.columns:
+        return pd.DataFrame(columns=["vendedor", "contratos", "al_corriente", "pct_vencido"])
+    agg = df_res.assign(al_corriente=df_res["saldo_vencido"] <= 0.01).groupby("vendedor").agg(
+        contratos=("ubicacion", "size"),
+        al_corriente=("al_corriente", "sum"),
+        vencido=("saldo_vencido", "sum"),
+        esperado=("deuda_esperada", "sum"),
+    )
+    agg["pct_vencido"] = (agg["vencido"] / agg["esperado"]).where(agg["esperado"] > 0, 0.0)
+    return agg.drop(columns=["vencido", "esperado"]).reset_index()
+
+
+# --- VISTA ---
+def render_comisiones(df_v, df_g, df_vd, URL_SHEET, fmt_moneda):
+    st.title("💼 Comisiones y Desempeño de Vendedores")
+
+    libro = obtener_libro_comisiones(df_v, df_g, df_vd, URL_SHEET)
+    if not libro:
+        st.info("No hay ventas ni pagos de comisión registrados.")
+        return
+
+    df_libro = pd.DataFrame.from_dict(libro, orient="index").rename_axis("vendedor").reset_index()
+    df_libro["pendiente"] = df_libro["devengada"] - df_libro["pagada"]
+    df_libro = df_libro.merge(calidad_cobranza_vendedores(resultado_tarea(URL_SHEET, "cartera")), on="vendedor", how="left")
+    df_libro = df_libro.sort_values("volumen", ascending=False)
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Comisión Devengada", fmt_moneda(df_libro["devengada"].sum()))
+    c2.metric("Comisión Pagada", fmt_moneda(df_libro["pagada"].sum()))
+    c3.metric("Comisión Pendiente", fmt_moneda(df_libro["pendiente"].sum()))
+
+    nuevos_nombres = {
+        "vendedor": "Vendedor",
+        "ventas": "Ventas",
+        "volumen": "Volumen Vendido",
+        "devengada": "Comisión Devengada",
+        "pagada": "Comisión Pagada",
+        "pendiente": "Pendiente de Pago",
+        "contratos": "Contratos",
+        "al_corriente": "Al Corriente",
+        "pct_vencido": "% Cartera Vencida",
+    }
+    df_visual = df_libro[list(nuevos_nombres)].rename(columns=nuevos_nombres)
+    df_estilizado = df_visual.style.format({
+        "Volumen Vendido": "$ {:,.2f}",
+        "Comisión Devengada": "$ {:,.2f}",
+        "Comisión Pagada": "$ {:,.2f}",
+        "Pendiente de Pago": "$ {:,.2f}",
+        "Contratos": "{:,.0f}",
+        "Al Corriente": "{:,.0f}",
+        "% Cartera Vencida": "{:.1%}",
+    }, na_rep="-").set_table_styles([
+        {'selector': 'th', 'props': [('text-align', 'center'), ('background-color', '#f0f2f6')]},
+        {'selector': 'td', 'props': [('text-align', 'center')]}
+    ])
+    st.dataframe(df_estilizado, use_container_width=True, hide_index=True)
+
+    if SIN_ASIGNAR in libro:
+        st.caption(f"'{SIN_ASIGNAR}' agrupa ventas sin vendedor y gastos de comisión cuyo vendedor no se pudo identificar.")
+    ultima = ultima_ejecucion(URL_SHEET)
+    st.caption(
+        f"Contratos y cartera vencida calculados al {ultima:%d-%b-%Y %H:%M}." if ultima
+        else "Contratos y cartera vencida: las tareas nocturnas aún se están ejecutando."
+    )
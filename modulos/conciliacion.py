@@ -0,0 +1,174 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+from modulos.control_pagos import normalizar_folio
+
+# Nombres de columna habituales en los estados de cuenta de los bancos
+ALIAS_BANCO = {
+    "fecha": ["fecha", "fecha operacion", "fecha operación", "fecha movimiento", "date"],
+    "monto": ["monto", "importe", "abono", "abonos", "deposito", "depósito", "cargo/abono", "amount"],
+    "referencia": ["referencia", "folio", "concepto", "descripcion", "descripción", "reference"],
+}
+
+
+def leer_estado_cuenta(archivo):
+    df = pd.read_csv(archivo)
+    columnas = {c.strip().lower(): c for c in df.columns}
+    renombre = {}
+    for destino, alias in ALIAS_BANCO.items():
+        for a in alias:
+            if a in columnas:
+                renombre[columnas[a]] = destino
+                break
+    df = df.rename(columns=renombre)
+    if "referencia" not in df.columns:
+        df["referencia"] = ""
+
+    montos = df["monto"].astype(str).str.replace(r"[$,\s]", "", regex=True) if "monto" in df.columns else ""
+    df["monto"] = pd.to_numeric(montos, errors="coerce")
+    df["fecha"] = pd.to_datetime(df.get("fecha"), errors="coerce", dayfirst=True)
+    # Solo abonos: los cargos (montos negativos) no corresponden a pagos de clientes
+    return df[df["monto"] > 0].dropna(subset=["fecha"]).reset_index(drop=True)
+
+
+def _claves(df, col_fecha, col_monto, base):
+    # Clave entera monto(centavos) + día: ordenar por ella agrupa por monto y luego por fecha
+    centavos = (df[col_monto].astype(float) * 100).round().astype(np.int64)
+    dias = (df[col_fecha] - base).dt.days.astype(np.int64)
+    return centavos * 1_000_000 + dias
+
+
+def conciliar(df_banco, df_p, dias_ventana=3):
+    # Cruce en dos pasos:
+    #   1) hash join por folio/referencia
+    #   2) sort-merge por monto exacto y ventana de fechas (searchsorted sobre claves ordenadas)
+    banco = df_banco.reset_index(drop=True).copy()
+    banco["id_banco"] = np.arange(len(banco))
+    pagos = df_p.copy()
+    pagos["fecha"] = pd.to_datetime(pagos["fecha"], errors="coerce")
+    pagos["monto"] = pd.to_numeric(pagos["monto"], errors="coerce").fillna(0.0)
+    pagos = pagos.dropna(subset=["fecha"])
+    col_folio = pagos["folio"] if "folio" in pagos.columns else pd.Series("", index=pagos.index)
+
+    # --- PASO 1: FOLIO ---
+    banco["folio_norm"] = banco["referencia"].map(normalizar_folio)
+    pagos["folio_norm"] = col_folio.map(normalizar_folio)
+    por_folio = banco[banco["folio_norm"] != ""].merge(
+        pagos[pagos["folio_norm"] != ""], on="folio_norm", suffixes=("_banco", "_pago")
+    )
+    repetidos = por_folio["id_banco"].duplicated(keep=False) | por_folio["id_pago"].duplicated(keep=False)
+    mismo_monto = (por_folio["monto_banco"] - por_folio["monto_pago"]).abs() < 0.01
+    folio_ok = por_folio[~repetidos & mismo_monto].assign(criterio="Folio")
+    dudosos = repetidos | ~mismo_monto
+    folio_dudoso = pd.DataFrame({
+        "id_banco": por_folio.loc[dudosos, "id_banco"],
+        "id_pago": por_folio.loc[dudosos, "id_pago"],
+        "motivo": np.where(repetidos[dudosos], "Folio repetido", "Folio con monto distinto"),
+    })
+
+    usados_banco = set(por_folio["id_banco"])
+    usados_pago = set(por_folio["id_pago"])
+    resto_b = banco[~banco["id_banco"].isin(usados_banco)]
+    resto_p = pagos[~pagos["id_pago"].isin(usados_pago)]
+
+    # --- PASO 2: MONTO + VENTANA DE FECHAS ---
+    if not resto_b.empty and not resto_p.empty:
+        base = min(resto_b["fecha"].min(), resto_p["fecha"].min()) - pd.Timedelta(days=dias_ventana + 1)
+        resto_p = resto_p.assign(_clave=_claves(resto_p, "fecha", "monto", base).values).sort_values("_clave")
+        claves_p = resto_p["_clave"].to_numpy()
+        claves_b = _claves(resto_b, "fecha", "monto", base).to_numpy()
+        ini = np.searchsorted(claves_p, claves_b - dias_ventana, side="left")
+        fin = np.searchsorted(claves_p, claves_b + dias_ventana, side="right")
+        candidatos = fin - ini
+    else:
+        ini = candidatos = np.zeros(len(resto_b), dtype=np.int64)
+
+    unicos = candidatos == 1
+    pares = resto_b[unicos].assign(id_pago=resto_p["id_pago"].to_numpy()[ini[unicos]])
+    # Un mismo pago no puede conciliar dos movimientos
+    choque = pares["id_pago"].duplicated(keep=False)
+    fecha_ok = pares[~choque].merge(
+        resto_p.drop(columns=["_clave", "folio_norm"], errors="ignore"), on="id_pago", suffixes=("_banco", "_pago")
+    ).assign(criterio="Monto y fecha")
+
+    # Cada movimiento con varios candidatos se expande a un par (movimiento, pago) por candidato:
+    # los candidatos ocupan el rango ini..fin de los pagos ordenados por clave
+    varios = candidatos > 1
+    rep = candidatos[varios]
+    pos = np.repeat(ini[varios], rep) + np.arange(rep.sum()) - np.repeat(np.cumsum(rep) - rep, rep)
+    ambiguos_fecha = pd.concat([
+        pd.DataFrame({
+            "id_banco": np.repeat(resto_b["id_banco"].to_numpy()[varios], rep),
+            "id_pago": resto_p["id_pago"].to_numpy()[pos],
+            "motivo": "Varios pagos posibles",
+        }),
+        pares.loc[choque, ["id_banco", "id_pago"]].assign(motivo="Pago disputado por varios movimientos"),
+    ])
+
+    # --- RESULTADOS ---
+    internas = ["folio_norm", "id_banco"]
+    conciliados = pd.concat([folio_ok, fecha_ok], ignore_index=True)
+    pares_dudosos = pd.concat([folio_dudoso, ambiguos_fecha], ignore_index=True)
+    # Una fila por movimiento del banco con el mismo formato en todos los casos
+    ambiguos = (
+        pares_dudosos.assign(id_pago=pares_dudosos["id_pago"].astype(str))
+        .groupby("id_banco", sort=True)
+        .agg(motivo=("motivo", "first"), candidatos=("id_pago", ", ".join))
+        .join(banco.set_index("id_banco")[["fecha", "monto", "referencia"]])
+        .rename(columns={"fecha": "fecha_banco", "monto": "monto_banco"})
+        .reset_index(drop=True)[["fecha_banco", "monto_banco", "referencia", "motivo", "candidatos"]]
+    )
+    sin_pago = resto_b[candidatos == 0]
+    # Los pagos candidatos quedan pendientes de revisión, no como pagos sin movimiento
+    ids_revisados = set(conciliados["id_pago"]) | set(pares_dudosos["id_pago"])
+    sin_banco = pagos[~pagos["id_pago"].isin(ids_revisados)]
+
+    return {
+        "conciliados": conciliados.drop(columns=internas, errors="ignore"),
+        "ambiguos": ambiguos,
+        "sin_pago": sin_pago.drop(columns=internas, errors="ignore"),
+        "sin_banco": sin_banco.drop(columns=internas, errors="ignore"),
+    }
+
+
+# --- VISTA ---
+def render_conciliacion(df_p, fmt_moneda):
+    st.subheader("🏦 Conciliación Bancaria")
+    st.caption("Suba el estado de cuenta en CSV (columnas de fecha, monto/importe y referencia/concepto).")
+
+    if df_p.empty or "id_pago" not in df_p.columns:
+        st.info("No hay pagos registrados para conciliar.")
+        return
+
+    c1, c2 = st.columns(2)
+    archivo = c1.file_uploader("Estado de cuenta (CSV)", type=["csv"], key="csv_banco")
+    dias = c2.number_input("Ventana de fechas (± días)", min_value=0, max_value=15, value=3)
+    excluir_efectivo = c2.toggle("Excluir pagos en efectivo", value=True)
+
+    if archivo is None:
+        return
+
+    df_banco = leer_estado_cuenta(archivo)
+    if df_banco.empty:
+        st.error("No se encontraron abonos válidos en el archivo.")
+        return
+
+    pagos = df_p[df_p["metodo"] != "Efectivo"] if excluir_efectivo and "metodo" in df_p.columns else df_p
+    res = conciliar(df_banco, pagos, dias_ventana=int(dias))
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Conciliados", len(res["conciliados"]))
+    m2.metric("Ambiguos", len(res["ambiguos"]))
+    m3.metric("Banco sin pago", len(res["sin_pago"]), help=fmt_moneda(res["sin_pago"]["monto"].sum()))
+    m4.metric("Pagos sin banco", len(res["sin_banco"]), help=fmt_moneda(res["sin_banco"]["monto"].sum()))
+
+    t1, t2, t3, t4 = st.tabs(["✅ Conciliados", "⚠️ Ambiguos", "🏦 Banco sin pago", "💵 Pagos sin banco"])
+    with t1:
+        st.dataframe(res["conciliados"], use_container_width=True, hide_index=True)
+    with t2:
+        st.dataframe(res["ambiguos"], use_container_width=True, hide_index=True)
+    with t3:
+        st.dataframe(res["sin_pago"], use_container_width=True, hide_index=True)
+    with t4:
+        st.dataframe(res["sin_banco"], use_container_width=True, hide_index=True)
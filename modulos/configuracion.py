@@ -0,0 +1,16 @@
+import streamlit as st
+
+# --- CONFIGURACIÓN ---
+# Toda la configuración de la app vive en secrets.toml (igual que la conexión y los desarrollos):
+#   ttl_lectura_segundos = 300
+#   hora_tareas_nocturnas = 2
+#   dir_respaldos = "respaldos"
+#   [desarrollos]
+#   "Zona Valle" = "https://docs.google.com/spreadsheets/d/.../"
+
+def leer_configuracion(clave, defecto):
+    try:
+        return st.secrets.get(clave, defecto)
+    except Exception:
+        # Sin secrets.toml (p. ej. al ejecutar fuera de Streamlit) se usan los valores por defecto
+        return defecto
@@ -0,0 +1,155 @@
+import uuid
+
+import streamlit as st
+import pandas as pd
+
+from modulos.desarrollos import indice_compartido, actualizar_indice
+
+# Columnas que puede aportar un archivo de importación (id_pago y cliente se asignan al importar)
+COLUMNAS_IMPORTACION = ["fecha", "ubicacion", "monto", "metodo", "folio", "comentarios"]
+
+# --- ÍNDICE DE PAGOS (folio y huella ubicación/fecha/monto) ---
+# Permite validar un pago nuevo en O(1) antes de escribir en la hoja. Se arma una vez por versión
+# de la pestaña pagos, lo comparten todas las sesiones y los pagos nuevos se le agregan al guardarlos.
+
+def normalizar_folio(folio):
+    # Una columna de folios con vacíos se lee como float: 123456.0 debe coincidir con "123456"
+    if folio is None or (isinstance(folio, float) and pd.isna(folio)):
+        return ""
+    if isinstance(folio, float) and folio.is_integer():
+        folio = int(folio)
+    folio = str(folio).strip().upper()
+    return "" if folio in ("", "NAN", "NONE") else folio
+
+
+def huella_pago(ubicacion, fecha, monto):
+    try:
+        fecha = pd.to_datetime(fecha).strftime('%Y-%m-%d')
+    except (ValueError, TypeError):
+        fecha = str(fecha)
+    try:
+        monto = round(float(monto), 2)
+    except (ValueError, TypeError):
+        monto = 0.0
+    return (str(ubicacion).strip(), fecha, monto)
+
+
+def _columnas_huella(df):
+    fechas = pd.to_datetime(df["fecha"], errors="coerce").dt.strftime('%Y-%m-%d').fillna(df["fecha"].astype(str))
+    montos = pd.to_numeric(df["monto"], errors="coerce").fillna(0.0).round(2)
+    return df["ubicacion"].astype(str).str.strip(), fechas, montos
+
+
+def _entradas_indice(df_p):
+    # (folio, id) y (huella, id); ante repetidos se conserva el primer pago, como en la hoja
+    ids = df_p["id_pago"] if "id_pago" in df_p.columns else pd.Series(range(len(df_p)), index=df_p.index)
+    folios = df_p["folio"].map(normalizar_folio) if "folio" in df_p.columns else pd.Series("", index=df_p.index)
+    con_folio = folios != ""
+    por_folio = pd.Series(ids[con_folio].values, index=folios[con_folio].values)
+    huellas = pd.Series(ids.values, index=pd.MultiIndex.from_arrays(_columnas_huella(df_p)).to_flat_index())
+    return (
+        por_folio[~por_folio.index.duplicated()].to_dict(),
+        huellas[~huellas.index.duplicated()].to_dict(),
+    )
+
+
+def construir_indice_pagos(df_p):
+    if df_p.empty or not {"ubicacion", "fecha", "monto"}.issubset(df_p.columns):
+        return {"folios": {}, "huellas": {}}
+    folios, huellas = _entradas_indice(df_p)
+    return {"folios": folios, "huellas": huellas}
+
+
+def obtener_indice_pagos(df_p, URL_SHEET):
+    return indice_compartido("pagos", URL_SHEET, lambda: construir_indice_pagos(df_p), df_p)
+
+
+def registrar_pagos_indice(URL_SHEET, version_leida, version_escrita, df_nuevos):
+    # Llamar después de guardar pagos nuevos: se agregan al índice sin recorrer la pestaña
+    folios, huellas = _entradas_indice(df_nuevos)
+    actualizar_indice("pagos", URL_SHEET, "pagos", version_leida, version_escrita, lambda indice: {
+        "folios": {**folios, **indice["folios"]},
+        "huellas": {**huellas, **indice["huellas"]},
+    })
+
+
+def validar_pago(indice, ubicacion, fecha, monto, folio="", id_excluir=None):
+    # Devuelve los conflictos encontrados: {"folio": mensaje, "huella": mensaje} (vacío si el pago es nuevo)
+    conflictos = {}
+    folio = normalizar_folio(folio)
+    id_folio = indice["folios"].get(folio) if folio else None
+    if id_folio is not None and str(id_folio) != str(id_excluir):
+        conflictos["folio"] = f"El folio '{folio}' ya está registrado en el pago ID {id_folio}."
+    id_huella = indice["huellas"].get(huella_pago(ubicacion, fecha, monto))
+    if id_huella is not None and str(id_huella) != str(id_excluir):
+        conflictos["huella"] = f"Ya existe un pago de {ubicacion} con la misma fecha y monto (ID {id_huella})."
+    return conflictos
+
+
+def fechas_importacion(serie):
+    # AAAA-MM-DD o día primero (DD/MM/AAAA), igual que los estados de cuenta en conciliacion.py
+    texto = serie.astype(str).str.strip()
+    iso = pd.to_datetime(texto, format="%Y-%m-%d", errors="coerce")
+    return iso.fillna(pd.to_datetime(texto.where(iso.isna()), errors="coerce", dayfirst=True, format="mixed"))
+
+
+def validar_importacion(df_nuevos, ubicaciones_con_contrato):
+    # Deja solo las columnas de la pestaña de pagos y separa las filas sin contrato, fecha o monto válido
+    df = df_nuevos[[c for c in COLUMNAS_IMPORTACION if c in df_nuevos.columns]].copy()
+    df["ubicacion"] = df["ubicacion"].astype(str).str.strip()
+    df["monto"] = pd.to_numeric(df["monto"].astype(str).str.replace(r"[$,\s]", "", regex=True), errors="coerce")
+    fechas = fechas_importacion(df["fecha"])
+
+    motivos = pd.Series("", index=df.index)
+    motivos[fechas.isna()] = "Fecha inválida"
+    motivos[(motivos == "") & ~(df["monto"] > 0)] = "Monto inválido"
+    motivos[(motivos == "") & ~df["ubicacion"].isin(set(ubicaciones_con_contrato))] = "Ubicación sin contrato"
+
+    validos = motivos == ""
+    df_ok = df[validos].assign(fecha=fechas[validos].dt.strftime('%Y-%m-%d'))
+    return df_ok, df[~validos].assign(motivo_rechazo=motivos[~validos])
+
+
+def filtrar_pagos_nuevos(indice, df_nuevos):
+    # Separa un lote importado en pagos aceptados y rechazados (contra la hoja y dentro del propio lote)
+    folios = dict(indice["folios"])
+    huellas = dict(indice["huellas"])
+    ubis, fechas, montos = _columnas_huella(df_nuevos)
+    col_folios = df_nuevos["folio"].map(normalizar_folio) if "folio" in df_nuevos.columns else pd.Series("", index=df_nuevos.index)
+
+    motivos = []
+    for folio, huella in zip(col_folios, zip(ubis, fechas, montos)):
+        if folio and folio in folios:
+            motivos.append(f"Folio duplicado ({folio})")
+        elif huella in huellas:
+            motivos.append("Misma ubicación, fecha y monto")
+        else:
+            motivos.append("")
+            huellas[huella] = "importación"
+            if folio:
+                folios[folio] = "importación"
+
+    df_rev = df_nuevos.copy()
+    df_rev["motivo_rechazo"] = motivos
+    es_aceptado = df_rev["motivo_rechazo"] == ""
+    return df_rev[es_aceptado].drop(columns=["motivo_rechazo"]), df_rev[~es_aceptado]
+
+
+# --- CLAVES DE IDEMPOTENCIA ---
+# La clave va en el nombre del formulario (st.form(f"...{clave}")): un envío solo se procesa
+# si viene del formulario dibujado con la clave vigente. La clave se consume antes de escribir;
+# desde ese momento se dibuja otro formulario y cualquier reenvío del anterior (doble clic,
+# envío repetido tras st.rerun) ya no corresponde a ningún formulario en pantalla.
+def clave_formulario(nombre):
+    claves = st.session_state.setdefault("claves_formulario", {})
+    if nombre not in claves or clave_consumida(claves[nombre]):
+        claves[nombre] = uuid.uuid4().hex
+    return claves[nombre]
+
+
+def clave_consumida(clave):
+    return clave in st.session_state.setdefault("claves_procesadas", set())
+
+
+def consumir_clave(clave):
+    st.session_state.setdefault("claves_procesadas", set()).add(clave)
@@ -1,9 +1,8 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
+from modulos.cartera import resumen_cartera, tabla_amortizacion_cartera
+from modulos.estados_cuenta import render_exportacion_estados
 
-def render_detalle_credito(df_v, df_p, fmt_moneda):
+def render_detalle_credito(df_v, df_p, URL_SHEET, fmt_moneda):
     st.title("📊 Detalle de Crédito y Estado de Cuenta")
     
     if df_v.empty:
@@ -15,31 +14,20 @@ def render_detalle_credito(df_v, df_p, fmt_moneda):
     seleccion = st.selectbox("🔍 Seleccione un Contrato:", opciones_vta)
     
     ubi_sel = seleccion.split(" | ")[0]
-    v = df_v[df_v["ubicacion"] == ubi_sel].iloc[0]
     
-    # --- CÁLCULOS FINANCIEROS ---
+    # --- CÁLCULOS FINANCIEROS (mismo motor que la cartera completa) ---
+    df_contrato = resumen_cartera(df_v[df_v["ubicacion"] == ubi_sel].head(1), df_p)
+    v = df_contrato.iloc[0]
+
     precio_total_vta = float(v['precio_total'])
     enganche_vta = float(v['enganche'])
-    monto_a_financiar = precio_total_vta - enganche_vta
-    
-    # Suma de abonos registrados en la tabla de pagos
-    abonos_mensuales = df_p[df_p["ubicacion"] == ubi_sel]["monto"].sum() if not df_p.empty else 0
-    total_pagado_acumulado = enganche_vta + abonos_mensuales
-    
-    porcentaje_total = (total_pagado_acumulado / precio_total_vta) if precio_total_vta > 0 else 0
-    porcentaje_total = min(1.0, porcentaje_total)
+    total_pagado_acumulado = float(v['total_pagado'])
+    porcentaje_total = float(v['porcentaje_pagado'])
+    fecha_contrato = v['fecha']
 
     # Lógica de morosidad
-    mensualidad_pactada = float(v['mensualidad'])
-    fecha_contrato = pd.to_datetime(v['fecha'])
-    hoy = datetime.now()
-    
-    meses_transcurridos = (hoy.year - fecha_contrato.year) * 12 + (hoy.month - fecha_contrato.month)
-    meses_a_deber = max(0, min(meses_transcurridos, int(v['plazo_meses'])))
-    deuda_esperada_a_hoy = meses_a_deber * mensualidad_pactada
-    
-    saldo_vencido = max(0, deuda_esperada_a_hoy - abonos_mensuales)
-    num_atrasos = saldo_vencido / mensualidad_pactada if mensualidad_pactada > 0 else 0
+    saldo_vencido = float(v['saldo_vencido'])
+    num_atrasos = float(v['num_atrasos'])
 
     # --- SECCIÓN: INFORMACIÓN GENERAL Y BARRA ---
     st.markdown("### 📋 Resumen del Crédito")
@@ -61,47 +49,30 @@ def render_detalle_credito(df_v, df_p, fmt_moneda):
         st.metric("Saldo Vencido", fmt_moneda(saldo_vencido), 
                   delta=f"{int(num_atrasos)} meses" if num_atrasos >= 1 else "Al día", 
                   delta_color="inverse")
-        st.write(f"**📉 Restante:** {fmt_moneda(max(0, precio_total_vta - total_pagado_acumulado))}")
+        st.write(f"**📉 Restante:** {fmt_moneda(v['saldo_restante'])}")
+        if v['recargos'] > 0:
+            st.write(f"**⏰ Recargos por Mora:** {fmt_moneda(v['recargos'])} (pendientes {fmt_moneda(v['recargos_pendientes'])})")
+
+    if v['tipo_interes'] != "Sin interés" or v['meses_gracia'] > 0 or v['pago_final'] > 0 or v['recargo_mora'] > 0:
+        st.caption(
+            f"Condiciones: {v['tipo_interes']} · Tasa anual {v['tasa_anual']:.2f}% · "
+            f"Gracia {int(v['meses_gracia'])} meses · Pago final {fmt_moneda(v['pago_final'])} · "
+            f"Recargo por mora {v['recargo_mora']:.2f}%"
+        )
 
     st.divider()
 
     # --- GENERACIÓN DE LA TABLA DE AMORTIZACIÓN ---
     st.subheader("📅 Cronograma de Pagos")
     
-    datos_amort = []
-    saldo_insoluto = monto_a_financiar
-    acumulado_pagado = abonos_mensuales
-
-    for i in range(1, int(v['plazo_meses']) + 1):
-        fecha_pago = fecha_contrato + relativedelta(months=i)
-        
-        # Determinar estatus de la cuota
-        if acumulado_pagado >= mensualidad_pactada:
-            estatus = "✅ Pagado"
-            acumulado_pagado -= mensualidad_pactada
-        elif acumulado_pagado > 0:
-            estatus = "⚠️ Parcial"
-            acumulado_pagado = 0
-        else:
-            estatus = "⏳ Pendiente"
-            
-        saldo_insoluto = max(0, saldo_insoluto - mensualidad_pactada)
-        
-        datos_amort.append({
-            "n_cuota": i,
-            "fecha_pago": fecha_pago,
-            "monto_cuota": mensualidad_pactada,
-            "estado": estatus,
-            "saldo_pendiente": saldo_insoluto
-        })
-
-    df_amort = pd.DataFrame(datos_amort)
+    df_amort = tabla_amortizacion_cartera(df_contrato).drop(columns=["ubicacion"])
 
     # --- DISEÑO PROFESIONAL DE LA TABLA ---
     nuevos_nombres_amort = {
         "n_cuota": "No. Cuota",
         "fecha_pago": "Fecha de Pago",
         "monto_cuota": "Monto de Cuota",
+        "interes": "Interés",
         "estado": "Estatus",
         "saldo_pendiente": "Saldo Restante"
     }
@@ -112,6 +83,7 @@ def render_detalle_credito(df_v, df_p, fmt_moneda):
     df_amort_estilizado = df_visual.style.format({
         "Fecha de Pago": lambda t: t.strftime('%d-%b-%Y'),
         "Monto de Cuota": "$ {:,.2f}",
+        "Interés": "$ {:,.2f}",
         "Saldo Restante": "$ {:,.2f}",
         "No. Cuota": "{:,.0f}"
     }).set_table_styles([
@@ -124,3 +96,9 @@ def render_detalle_credito(df_v, df_p, fmt_moneda):
         use_container_width=True, 
         hide_index=True
     )
+
+    st.divider()
+
+    # --- EXPORTACIÓN MASIVA DE ESTADOS DE CUENTA ---
+    with st.expander("📦 Exportar estados de cuenta de todos los contratos activos"):
+        render_exportacion_estados(df_v, df_p, URL_SHEET)
@@ -0,0 +1,218 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from modulos.configuracion import leer_configuracion
+from modulos.tareas import resultado_tarea
+
+# --- CATÁLOGO DE DESARROLLOS ---
+# Cada desarrollo es un libro de Google Sheets, configurado en la sección [desarrollos] de secrets.toml.
+# Todos comparten la misma conexión (st.connection es un recurso único por proceso).
+
+def cargar_desarrollos(defecto):
+    return dict(leer_configuracion("desarrollos", {})) or dict(defecto)
+
+
+# --- CACHÉ POR DESARROLLO ---
+# Las lecturas se guardan por (libro, pestaña, versión). Cada pestaña tiene su propia versión:
+# guardar_hoja solo incrementa la de la pestaña que escribió y el resto sigue en caché.
+# Cada TTL_LECTURA segundos se vuelve a leer la hoja; si su contenido cambió fuera de la app
+# (edición directa en Google Sheets) la pestaña pasa a una versión nueva.
+# La versión con que se leyó cada tabla viaja en df.attrs["version"].
+TTL_LECTURA = int(leer_configuracion("ttl_lectura_segundos", 300))
+
+@st.cache_resource
+def _estado_cache():
+    # Un solo estado por proceso: versiones por pestaña, firma de la última lectura, índices derivados
+    # y pestañas que no existían en cierta versión
+    return {"lock": threading.Lock(), "versiones": {}, "firmas": {}, "indices": {}, "faltantes": {}}
+
+
+def version_hoja(URL_SHEET, hoja):
+    versiones = _estado_cache()["versiones"]
+    return (versiones.get(URL_SHEET, 0), versiones.get((URL_SHEET, hoja), 0))
+
+
+def invalidar_cache(URL_SHEET):
+    # Todo el libro (botón de actualizar)
+    estado = _estado_cache()
+    with estado["lock"]:
+        estado["versiones"][URL_SHEET] = estado["versiones"].get(URL_SHEET, 0) + 1
+
+
+def nueva_version(URL_SHEET, hoja):
+    # Después de escribir una pestaña; devuelve la versión que corresponde a lo escrito
+    estado = _estado_cache()
+    with estado["lock"]:
+        estado["versiones"][(URL_SHEET, hoja)] = estado["versiones"].get((URL_SHEET, hoja), 0) + 1
+        return version_hoja(URL_SHEET, hoja)
+
+
+def _firma(df):
+    if df.empty:
+        return 0
+    return int(pd.util.hash_pandas_object(df.astype(str), index=False).sum())
+
+
+@st.cache_data(ttl=2 * TTL_LECTURA, max_entries=200, show_spinner=False)
+def _leer_en_cache(_conn, URL_SHEET, hoja, version, periodo):
+    # La firma se calcula una vez por lectura real, no en cada render
+    df = _conn.read(spreadsheet=URL_SHEET, worksheet=hoja, ttl=0)
+    return df, _firma(df)
+
+
+def leer_hoja(conn, URL_SHEET, hoja):
+    version = version_hoja(URL_SHEET, hoja)
+    df, firma = _leer_en_cache(conn, URL_SHEET, hoja, version, int(time.time() // TTL_LECTURA))
+    estado, clave = _estado_cache(), (URL_SHEET, hoja)
+    with estado["lock"]:
+        previa = estado["firmas"].get(clave)
+        if previa is not None and previa[0] == version and previa[1] != firma:
+            # Misma versión con otro contenido: la hoja se editó directamente
+            estado["versiones"][clave] = estado["versiones"].get(clave, 0) + 1
+            version = version_hoja(URL_SHEET, hoja)
+        if previa is None or previa[0] <= version:
+            estado["firmas"][clave] = (version, firma)
+    df.attrs.update(hoja=hoja, version=version)
+    return df
+
+
+def leer_hoja_opcional(conn, URL_SHEET, hoja):
+    # Para pestañas que se crean al primer uso: si no existe devuelve None y no se vuelve a consultar
+    # hasta que cambie su versión (al crearla con guardar_hoja/nueva_version o con el botón de actualizar).
+    # gspread es dependencia opcional del conector: su excepción se reconoce por nombre
+    version, estado = version_hoja(URL_SHEET, hoja), _estado_cache()
+    if estado["faltantes"].get((URL_SHEET, hoja)) == version:
+        return None
+    try:
+        return leer_hoja(conn, URL_SHEET, hoja)
+    except Exception as e:
+        if type(e).__name__ != "WorksheetNotFound":
+            raise
+        with estado["lock"]:
+            estado["faltantes"][(URL_SHEET, hoja)] = version
+        return None
+
+
+def version_de(df):
+    return df.attrs.get("hoja"), df.attrs.get("version")
+
+
+def _mas_reciente(a, b):
+    # a es más reciente que b si ninguna de sus pestañas está en una versión anterior
+    return len(a) == len(b) and all(ha == hb and va >= vb for (ha, va), (hb, vb) in zip(a, b))
+
+
+def indice_compartido(nombre, URL_SHEET, construir, *tablas):
+    # Índices derivados de pestañas del libro: se guardan bajo las versiones con que se leyeron
+    # esas tablas (no la versión vigente al consultar) y los comparten todas las sesiones.
+    # Una tabla que no viene de leer_hoja no tiene versión: el índice se arma solo para esta llamada.
+    versiones = tuple(version_de(df) for df in tablas)
+    if any(v is None for _, v in versiones):
+        return construir()
+    estado = _estado_cache()
+    guardado = estado["indices"].get((nombre, URL_SHEET))
+    if guardado is not None and guardado[0] == versiones:
+        return guardado[1]
+    indice = construir()
+    with estado["lock"]:
+        guardado = estado["indices"].get((nombre, URL_SHEET))
+        if guardado is None or not _mas_reciente(guardado[0], versiones):
+            estado["indices"][(nombre, URL_SHEET)] = (versiones, indice)
+    return indice
+
+
+def actualizar_indice(nombre, URL_SHEET, hoja, version_leida, version_escrita, aplicar):
+    # Tras guardar una pestaña: si el índice compartido se armó con la tabla que se acaba de modificar,
+    # aplicar(indice) devuelve el índice corregido y queda bajo la versión escrita; si no, el siguiente
+    # acceso lo reconstruye. aplicar no debe modificar el índice recibido: otras sesiones lo están leyendo.
+    # Varias actualizaciones de una misma escritura encuentran el índice ya en la versión escrita.
+    estado = _estado_cache()
+    with estado["lock"]:
+        guardado = estado["indices"].get((nombre, URL_SHEET))
+        if guardado is None or not {(hoja, version_leida), (hoja, version_escrita)} & set(guardado[0]):
+            return
+        versiones = tuple((h, version_escrita if h == hoja else v) for h, v in guardado[0])
+        estado["indices"][(nombre, URL_SHEET)] = (versiones, aplicar(guardado[1]))
+
+
+# --- REPORTE CONSOLIDADO ---
+def _leer_o_vacio(conn, URL_SHEET, hoja):
+    try:
+        return leer_hoja(conn, URL_SHEET, hoja)
+    except Exception:
+        return pd.DataFrame()
+
+
+def _monto(df, columna):
+    if df.empty or columna not in df.columns:
+        return 0.0
+    return float(pd.to_numeric(df[columna], errors="coerce").fillna(0).sum())
+
+
+def indicadores_desarrollo(conn, nombre, URL_SHEET):
+    # Cartera (por cobrar y vencido) del resumen que guardan las tareas nocturnas de cada libro;
+    # aquí solo se suman columnas de las pestañas
+    df_v, df_p, df_g, df_u = (_leer_o_vacio(conn, URL_SHEET, h) for h in ["ventas", "pagos", "gastos", "ubicaciones"])
+    resumen = resultado_tarea(URL_SHEET, "resumen") or {}
+    ingresos = _monto(df_v, "enganche") + _monto(df_p, "monto")
+    gastos = _monto(df_g, "monto")
+    vendidos = int((df_u["estatus"] == "Vendido").sum()) if "estatus" in df_u.columns else 0
+    return {
+        "desarrollo": nombre,
+        "ventas": len(df_v),
+        "lotes": len(df_u),
+        "avance": vendidos / len(df_u) if len(df_u) else 0.0,
+        "ingresos": ingresos,
+        "gastos": gastos,
+        "utilidad": ingresos - gastos,
+        "por_cobrar": resumen.get("por_cobrar", float("nan")),
+        "vencido": resumen.get("vencido", float("nan")),
+    }
+
+
+def consolidado(conn, desarrollos, hilos=None):
+    # La lectura de cada libro es E/S contra Google: se consultan todos a la vez. Los hilos reciben el
+    # contexto de la ejecución actual para que leer_hoja use la caché de Streamlit como en el hilo principal
+    hilos = hilos or max(1, min(8, len(desarrollos)))
+    with ThreadPoolExecutor(max_workers=hilos, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())) as pool:
+        filas = list(pool.map(lambda d: indicadores_desarrollo(conn, *d), desarrollos.items()))
+    return pd.DataFrame(filas)
+
+
+# --- VISTA ---
+def render_consolidado(conn, desarrollos, fmt_moneda):
+    st.title("🌐 Reporte Consolidado")
+    st.caption(
+        f"Indicadores de {len(desarrollos)} desarrollos, consultados en paralelo. "
+        "Por cobrar y saldo vencido vienen del último cálculo de las tareas nocturnas de cada desarrollo."
+    )
+
+    with st.spinner("Consultando desarrollos..."):
+        df = consolidado(conn, desarrollos)
+
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Ingresos Totales", fmt_moneda(df["ingresos"].sum()))
+    k2.metric("Gastos Totales", fmt_moneda(df["gastos"].sum()))
+    k3.metric("Por Cobrar", fmt_moneda(df["por_cobrar"].sum()))
+    k4.metric("Saldo Vencido", fmt_moneda(df["vencido"].sum()))
+
+    st.bar_chart(df.set_index("desarrollo")[["ingresos", "gastos", "por_cobrar"]])
+
+    df_visual = df.rename(columns={
+        "desarrollo": "Desarrollo", "ventas": "Ventas", "lotes": "Lotes", "avance": "% Vendido",
+        "ingresos": "Ingresos", "gastos": "Gastos", "utilidad": "Utilidad",
+        "por_cobrar": "Por Cobrar", "vencido": "Saldo Vencido",
+    })
+    st.dataframe(
+        df_visual.style.format({
+            "% Vendido": "{:.0%}", "Ingresos": fmt_moneda, "Gastos": fmt_moneda, "Utilidad": fmt_moneda,
+            "Por Cobrar": fmt_moneda, "Saldo Vencido": fmt_moneda,
+        }, na_rep="-"),
+        use_container_width=True,
+        hide_index=True,
+    )
@@ -0,0 +1,122 @@
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import streamlit as st
+import pandas as pd
+
+from modulos.cartera import contratos_activos, resumen_cartera, tabla_amortizacion_cartera
+
+COLUMNAS_RESUMEN = {
+    "ubicacion": "Ubicación",
+    "cliente": "Cliente",
+    "fecha": "Fecha de Contrato",
+    "precio_total": "Precio Total",
+    "enganche": "Enganche",
+    "plazo_meses": "Plazo (Meses)",
+    "mensualidad": "Mensualidad",
+    "total_pagado": "Total Pagado",
+    "saldo_vencido": "Saldo Vencido",
+    "recargos": "Recargos por Mora",
+    "recargos_pendientes": "Recargos Pendientes",
+    "saldo_restante": "Saldo Restante",
+}
+
+
+def generar_estado_xlsx(tarea):
+    # Se ejecuta en un proceso aparte: recibe solo datos (sin objetos de Streamlit)
+    nombre, resumen, df_amort, df_pagos = tarea
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        pd.DataFrame(list(resumen.items()), columns=["Concepto", "Valor"]).to_excel(writer, sheet_name="Resumen", index=False)
+        df_amort.to_excel(writer, sheet_name="Amortización", index=False)
+        df_pagos.to_excel(writer, sheet_name="Pagos", index=False)
+    return nombre, buffer.getvalue()
+
+
+def preparar_estados(df_v, df_p, fecha_corte=None):
+    # Un solo cálculo vectorizado para todos los contratos; luego se reparte por ubicación con groupby.
+    # Solo cuentan los pagos hechos hasta la fecha de corte, tanto en abonos como en la hoja de Pagos.
+    if fecha_corte is not None and not df_p.empty and "fecha" in df_p.columns:
+        df_p = df_p[pd.to_datetime(df_p["fecha"], errors="coerce") <= pd.Timestamp(fecha_corte)]
+    df_res = resumen_cartera(contratos_activos(df_v), df_p, hoy=fecha_corte)
+    if df_res.empty:
+        return [], []
+
+    # Contratos sin fecha válida no tienen calendario: se omiten y se reportan para corregirlos
+    sin_fecha = pd.to_datetime(df_res["fecha"], errors="coerce").isna()
+    omitidos = df_res.loc[sin_fecha, "ubicacion"].astype(str).tolist()
+    df_res = df_res[~sin_fecha]
+    if df_res.empty:
+        return [], omitidos
+
+    df_amort = tabla_amortizacion_cartera(df_res).rename(columns={
+        "n_cuota": "No. Cuota", "fecha_pago": "Fecha de Pago", "monto_cuota": "Monto de Cuota",
+        "interes": "Interés", "estado": "Estatus", "saldo_pendiente": "Saldo Restante",
+    })
+    amort_por_ubi = dict(tuple(df_amort.groupby("ubicacion")))
+    pagos_por_ubi = dict(tuple(df_p.drop(columns=["id_pago"], errors="ignore").groupby("ubicacion"))) if not df_p.empty else {}
+
+    tareas = []
+    for fila in df_res.to_dict("records"):
+        ubi = fila["ubicacion"]
+        resumen = {titulo: fila.get(col) for col, titulo in COLUMNAS_RESUMEN.items()}
+        resumen["Fecha de Contrato"] = pd.Timestamp(resumen["Fecha de Contrato"]).strftime('%d-%b-%Y')
+        nombre = re.sub(r"[^\w\-]+", "_", f"{ubi}_{fila.get('cliente', '')}").strip("_") + ".xlsx"
+        tareas.append((
+            nombre,
+            resumen,
+            amort_por_ubi.get(ubi, pd.DataFrame()).drop(columns=["ubicacion"], errors="ignore"),
+            pagos_por_ubi.get(ubi, pd.DataFrame()),
+        ))
+    return tareas, omitidos
+
+
+def exportar_estados_zip(tareas, procesos=None):
+    procesos = procesos or min(8, os.cpu_count() or 1)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        if procesos > 1 and len(tareas) > procesos:
+            # "spawn": un fork heredaría los hilos de Streamlit (y sus locks) en un estado inconsistente
+            with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn")) as pool:
+                lote = max(1, len(tareas) // (procesos * 4))
+                for nombre, contenido in pool.map(generar_estado_xlsx, tareas, chunksize=lote):
+                    zf.writestr(nombre, contenido)
+        else:
+            for nombre, contenido in map(generar_estado_xlsx, tareas):
+                zf.writestr(nombre, contenido)
+    return buffer.getvalue()
+
+
+# --- VISTA ---
+def render_exportacion_estados(df_v, df_p, URL_SHEET):
+    st.subheader("📦 Estados de Cuenta Masivos")
+    st.caption("Genera un archivo XLSX por contrato activo (resumen, amortización y pagos) dentro de un ZIP.")
+
+    fecha_corte = st.date_input("📅 Fecha de corte", value=datetime.now(), key="corte_estados")
+    if st.button("⚙️ Generar Estados de Cuenta", key="btn_estados"):
+        with st.spinner("Generando estados de cuenta..."):
+            tareas, omitidos = preparar_estados(df_v, df_p, fecha_corte)
+            if omitidos:
+                st.warning(f"⚠️ Contratos sin fecha válida, omitidos: {', '.join(omitidos)}")
+            if not tareas:
+                st.warning("No hay contratos activos.")
+                return
+            # Por desarrollo: al cambiar de libro no se ofrece el ZIP generado para otro.
+            # La fecha de corte se guarda con el ZIP para nombrarlo aunque luego cambie el selector.
+            st.session_state.setdefault("zip_estados", {})[URL_SHEET] = (exportar_estados_zip(tareas), len(tareas), fecha_corte)
+
+    generado = st.session_state.get("zip_estados", {}).get(URL_SHEET)
+    if generado:
+        contenido, total, corte_zip = generado
+        st.success(f"✅ {total} estados de cuenta generados al {corte_zip.strftime('%d-%b-%Y')}.")
+        st.download_button(
+            "⬇️ Descargar ZIP",
+            data=contenido,
+            file_name=f"estados_cuenta_{corte_zip.strftime('%Y%m%d')}.zip",
+            mime="application/zip",
+        )
@@ -1,9 +1,15 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from modulos.auditoria import guardar_hoja
+from modulos.desarrollos import version_de
+from modulos.integridad import reservar_ids
+from modulos.comisiones import aplicar_gasto
 
 def render_gastos(df_g, conn, URL_SHEET, fmt_moneda, cargar_datos):
     st.title("💸 Gestión de Gastos")
+    df_vd = cargar_datos("vendedores")
+    vendedores_list = ["--"] + (df_vd["nombre"].tolist() if not df_vd.empty and "nombre" in df_vd.columns else [])
     
     # --- VISTA GENERAL ---
     st.write("### 🔍 Historial de Gastos")
@@ -34,32 +40,27 @@ def render_gastos(df_g, conn, URL_SHEET, fmt_moneda, cargar_datos):
             f_mon = c1.number_input("💵 Monto ($)", min_value=0.0, step=100.0)
             f_des = c2.text_input("📝 Descripción / Concepto", placeholder="Ej: Pago de Facebook Ads")
             
+            f_vend = c1.selectbox("👔 Vendedor (solo para Comisiones)", vendedores_list)
             f_com = st.text_area("🗒️ Notas adicionales")
 
-            # Generación de ID automático
-            nuevo_id = 1
-            if not df_g.empty and "id_gasto" in df_g.columns:
-                try:
-                    nuevo_id = int(float(df_g["id_gasto"].max())) + 1
-                except:
-                    nuevo_id = len(df_g) + 1
-
             if st.form_submit_button("✅ REGISTRAR GASTO", type="primary"):
                 if f_mon <= 0:
                     st.error("El monto debe ser mayor a $0")
                 else:
                     nuevo_reg = pd.DataFrame([{
-                        "id_gasto": nuevo_id,
+                        "id_gasto": reservar_ids(conn, URL_SHEET, "gastos", df_g, "id_gasto"),
                         "fecha": f_fec.strftime('%Y-%m-%d'),
                         "categoria": f_cat,
                         "monto": f_mon,
                         "concepto": f_des,
-                        "notas": f_com
+                        "notas": f_com,
+                        "vendedor": f_vend if f_cat == "Comisiones" and f_vend != "--" else ""
                     }])
                     
+                    _, version_g = version_de(df_g)
                     df_g = pd.concat([df_g, nuevo_reg], ignore_index=True)
-                    conn.update(spreadsheet=URL_SHEET, worksheet="gastos", data=df_g)
-                    st.success(f"✅ Gasto por {fmt_moneda(f_mon)} registrado."); st.cache_data.clear(); st.rerun()
+                    aplicar_gasto(URL_SHEET, version_g, guardar_hoja(conn, URL_SHEET, "gastos", df_g), nuevo_reg, df_vd)
+                    st.success(f"✅ Gasto por {fmt_moneda(f_mon)} registrado."); st.rerun()
 
     # ---------------------------------------------------------
     # PESTAÑA 2: EDITAR O ELIMINAR
@@ -97,10 +98,10 @@ def render_gastos(df_g, conn, URL_SHEET, fmt_moneda, cargar_datos):
                         df_g.at[idx, "concepto"] = e_des
                         df_g.at[idx, "notas"] = e_com
                         
-                        conn.update(spreadsheet=URL_SHEET, worksheet="gastos", data=df_g)
-                        st.success("Gasto actualizado."); st.cache_data.clear(); st.rerun()
+                        guardar_hoja(conn, URL_SHEET, "gastos", df_g)
+                        st.success("Gasto actualizado."); st.rerun()
                         
                     if cb2.form_submit_button("🗑️ ELIMINAR GASTO"):
                         df_g = df_g.drop(idx)
-                        conn.update(spreadsheet=URL_SHEET, worksheet="gastos", data=df_g)
-                        st.error("Gasto eliminado."); st.cache_data.clear(); st.rerun()
+                        guardar_hoja(conn, URL_SHEET, "gastos", df_g)
+                        st.error("Gasto eliminado."); st.rerun()
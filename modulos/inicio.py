@@ -1,11 +1,13 @@
 import streamlit as st
+from modulos.tareas import resultado_tarea, render_estado_tareas
+from modulos.tableros import render_tablero
 
-def render_inicio(df_v, df_p, df_cl, fmt_moneda):
-    st.title("🏠 Sistema Zona Valle")
+def render_inicio(df_v, df_p, df_cl, df_u, conn, URL_SHEET, fmt_moneda):
+    st.title(f"🏠 Sistema {st.session_state.get('desarrollo', 'Zona Valle')}")
     st.success("✅ Conexión Estable")
-    
+
     st.markdown("---")
-    
+
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Ventas Totales", len(df_v))
@@ -15,5 +17,37 @@ def render_inicio(df_v, df_p, df_cl, fmt_moneda):
         total_recuperado = df_p["monto"].sum() if not df_p.empty else 0
         st.metric("Cobranza Total", fmt_moneda(total_recuperado))
 
-    st.subheader("📋 Ventas Recientes")
-    st.dataframe(df_v.tail(10), use_container_width=True, hide_index=True)
+    # --- CARTERA PRECALCULADA (tareas nocturnas) ---
+    st.subheader("📌 Estado de la Cartera")
+    render_estado_tareas(conn, URL_SHEET)
+    resumen = resultado_tarea(URL_SHEET, "resumen")
+    if resumen:
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Contratos Activos", resumen["contratos"])
+        c2.metric("Por Cobrar", fmt_moneda(resumen["por_cobrar"]))
+        c3.metric("Saldo Vencido", fmt_moneda(resumen["vencido"]), f"{resumen['contratos_atrasados']} contratos", delta_color="off")
+        c4.metric("Recargos Pendientes", fmt_moneda(resumen["recargos"]))
+
+    df_contactos = resultado_tarea(URL_SHEET, "contactos_atraso")
+    if df_contactos is not None and not df_contactos.empty:
+        with st.expander(f"📞 Clientes con atraso ({len(df_contactos)})"):
+            st.dataframe(
+                df_contactos.rename(columns={
+                    "ubicacion": "Ubicación", "cliente": "Cliente", "telefono": "Teléfono", "correo": "Correo",
+                    "saldo_vencido": "Saldo Vencido", "num_atrasos": "Cuotas Atrasadas", "recargos": "Recargos",
+                }).style.format({"Saldo Vencido": fmt_moneda, "Recargos": fmt_moneda}),
+                use_container_width=True,
+                hide_index=True,
+            )
+            st.download_button(
+                "⬇️ Descargar lista de contacto",
+                data=df_contactos.to_csv(index=False).encode("utf-8"),
+                file_name="clientes_con_atraso.csv",
+                mime="text/csv",
+            )
+
+    st.subheader("📊 Tablero")
+    render_tablero(df_v, df_p, df_u, resultado_tarea(URL_SHEET, "atrasos"))
+
+    with st.expander("📋 Ventas Recientes"):
+        st.dataframe(df_v.tail(10), use_container_width=True, hide_index=True)
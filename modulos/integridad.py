@@ -0,0 +1,169 @@
+import streamlit as st
+import pandas as pd
+
+from modulos.desarrollos import leer_hoja, leer_hoja_opcional, nueva_version
+
+HOJA_SECUENCIAS = "secuencias"
+
+# --- SECUENCIAS DE IDS ---
+# El último ID entregado por pestaña se guarda en su propia hoja: borrar filas ya no hace que se repitan IDs.
+
+def _max_id(df, columna):
+    if df.empty or columna not in df.columns:
+        return 0
+    maximo = pd.to_numeric(df[columna], errors="coerce").max()
+    return 0 if pd.isna(maximo) else int(maximo)
+
+
+def _leer_secuencias(conn, URL_SHEET):
+    # Mientras la pestaña no exista (se crea en la primera reserva) no se consulta en cada render
+    try:
+        df_s = leer_hoja_opcional(conn, URL_SHEET, HOJA_SECUENCIAS)
+    except Exception:
+        return pd.DataFrame(columns=["hoja", "ultimo_id"])
+    if df_s is None or df_s.empty or not {"hoja", "ultimo_id"}.issubset(df_s.columns):
+        return pd.DataFrame(columns=["hoja", "ultimo_id"])
+    return df_s[["hoja", "ultimo_id"]].dropna(subset=["hoja"])
+
+
+def _ultimos_ids(conn, URL_SHEET):
+    # La lectura de la hoja está en caché hasta que se invalida el desarrollo; las reservas
+    # hechas en esta sesión (por libro) se superponen para que dos reservas seguidas no se pisen
+    df_s = _leer_secuencias(conn, URL_SHEET)
+    ultimos = dict(zip(df_s["hoja"], pd.to_numeric(df_s["ultimo_id"], errors="coerce").fillna(0).astype(int)))
+    for hoja, ultimo in st.session_state.get("secuencias_reservadas", {}).get(URL_SHEET, {}).items():
+        ultimos[hoja] = max(ultimos.get(hoja, 0), ultimo)
+    return ultimos
+
+
+def proximo_id(conn, URL_SHEET, hoja, df, columna):
+    # Solo consulta (para mostrar el ID sugerido); no reserva nada
+    return max(_ultimos_ids(conn, URL_SHEET).get(hoja, 0), _max_id(df, columna)) + 1
+
+
+def reservar_ids(conn, URL_SHEET, hoja, df, columna, cantidad=1):
+    # Devuelve el primer ID del bloque reservado y persiste el nuevo último ID
+    inicio = proximo_id(conn, URL_SHEET, hoja, df, columna)
+    ultimos = {**_ultimos_ids(conn, URL_SHEET), hoja: inicio + cantidad - 1}
+    df_s = pd.DataFrame(list(ultimos.items()), columns=["hoja", "ultimo_id"])
+    try:
+        conn.update(spreadsheet=URL_SHEET, worksheet=HOJA_SECUENCIAS, data=df_s)
+    except Exception:
+        conn.create(spreadsheet=URL_SHEET, worksheet=HOJA_SECUENCIAS, data=df_s)
+    nueva_version(URL_SHEET, HOJA_SECUENCIAS)
+    st.session_state.setdefault("secuencias_reservadas", {}).setdefault(URL_SHEET, {})[hoja] = inicio + cantidad - 1
+    return inicio
+
+
+# --- INTEGRIDAD REFERENCIAL ---
+# Cruces por conjuntos (isin) sobre todas las pestañas en una sola pasada.
+# Cada problema indica qué pestañas, al escribirse, no pueden introducirlo.
+BLOQUEA = {
+    "Pago sin contrato": {"pagos", "ventas"},
+    "Venta sobre lote inexistente": {"ventas", "ubicaciones"},
+    "Venta con cliente inexistente": {"clientes"},
+    "Venta duplicada en ubicación": {"ventas"},
+    "ID duplicado": {"ventas", "pagos", "gastos", "clientes", "ubicaciones"},
+}
+
+
+HOJAS_REVISADAS = ["ventas", "pagos", "gastos", "ubicaciones", "clientes"]
+
+
+def _col(df, columna):
+    if df is None or df.empty:
+        return pd.Series(dtype=str)
+    if columna not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[columna].fillna("").astype(str).str.strip()
+
+
+def verificar_integridad(hojas):
+    df_v = hojas.get("ventas", pd.DataFrame())
+    df_p = hojas.get("pagos", pd.DataFrame())
+    df_u = hojas.get("ubicaciones", pd.DataFrame())
+    df_cl = hojas.get("clientes", pd.DataFrame())
+    problemas = []
+
+    def agregar(tipo, hoja, df, mascara, id_col, detalle):
+        if mascara.any():
+            sub = df[mascara.values]
+            problemas.append(pd.DataFrame({
+                "tipo": tipo, "hoja": hoja,
+                "id_registro": _col(sub, id_col).values,
+                "detalle": detalle(sub).values,
+            }))
+
+    ubis_venta = set(_col(df_v, "ubicacion"))
+    if not df_v.empty:
+        # Solo contratos activos (como contratos_activos): una venta cancelada no impide revender el lote
+        ubis = _col(df_v, "ubicacion").where(_col(df_v, "estatus_pago").isin(["", "Activo"]), "")
+        agregar("Venta duplicada en ubicación", "ventas", df_v, (ubis != "") & ubis.duplicated(keep=False), "id_venta",
+                lambda s: "Más de una venta sobre: " + _col(s, "ubicacion"))
+    if not df_p.empty:
+        agregar("Pago sin contrato", "pagos", df_p, ~_col(df_p, "ubicacion").isin(ubis_venta), "id_pago",
+                lambda s: "Ubicación sin venta: " + _col(s, "ubicacion"))
+    if not df_v.empty and not df_u.empty:
+        agregar("Venta sobre lote inexistente", "ventas", df_v, ~_col(df_v, "ubicacion").isin(set(_col(df_u, "ubicacion"))), "id_venta",
+                lambda s: "Lote no registrado: " + _col(s, "ubicacion"))
+    if not df_v.empty and not df_cl.empty:
+        agregar("Venta con cliente inexistente", "ventas", df_v, ~_col(df_v, "cliente").isin(set(_col(df_cl, "nombre"))), "id_venta",
+                lambda s: "Cliente no registrado: " + _col(s, "cliente"))
+    if not df_u.empty:
+        estatus = _col(df_u, "estatus")
+        en_venta = _col(df_u, "ubicacion").isin(ubis_venta)
+        agregar("Lote vendido sin venta", "ubicaciones", df_u, (estatus == "Vendido") & ~en_venta, "id_lote",
+                lambda s: "Marcado Vendido sin contrato: " + _col(s, "ubicacion"))
+        agregar("Lote con venta no marcado Vendido", "ubicaciones", df_u, (estatus != "Vendido") & en_venta, "id_lote",
+                lambda s: _col(s, "ubicacion") + " tiene contrato pero estatus " + _col(s, "estatus"))
+
+    for hoja, id_col in [("ventas", "id_venta"), ("pagos", "id_pago"), ("gastos", "id_gasto"), ("clientes", "id_cliente"), ("ubicaciones", "id_lote")]:
+        df = hojas.get(hoja, pd.DataFrame())
+        ids = pd.to_numeric(_col(df, id_col), errors="coerce")
+        agregar("ID duplicado", hoja, df, ids.notna() & ids.duplicated(keep=False), id_col,
+                lambda s, c=id_col: "ID repetido: " + _col(s, c))
+
+    if not problemas:
+        return pd.DataFrame(columns=["tipo", "hoja", "id_registro", "detalle"])
+    return pd.concat(problemas, ignore_index=True)
+
+
+def problemas_nuevos(conn, URL_SHEET, hoja, df_nuevo):
+    # Se ejecuta en cada escritura: compara el estado actual con el que resultaría y
+    # devuelve solo los problemas que introduce esta escritura y que la pestaña no puede causar
+    hojas = {}
+    for nombre in HOJAS_REVISADAS:
+        try:
+            hojas[nombre] = leer_hoja(conn, URL_SHEET, nombre)
+        except Exception:
+            hojas[nombre] = pd.DataFrame()
+    if hoja not in hojas:
+        return pd.DataFrame(columns=["tipo", "hoja", "id_registro", "detalle"])
+
+    antes = verificar_integridad(hojas)
+    despues = verificar_integridad({**hojas, hoja: df_nuevo})
+    claves = ["tipo", "hoja", "id_registro", "detalle"]
+    nuevos = despues.merge(antes[claves].drop_duplicates(), on=claves, how="left", indicator=True)
+    nuevos = nuevos[nuevos["_merge"] == "left_only"].drop(columns=["_merge"])
+    return nuevos[nuevos["tipo"].map(lambda t: hoja in BLOQUEA.get(t, set()))]
+
+
+# --- VISTA ---
+def render_integridad(cargar_datos):
+    st.subheader("🧪 Integridad de Datos")
+    st.caption("Revisión completa de referencias entre ventas, pagos, ubicaciones y clientes, e IDs repetidos (incluye gastos).")
+
+    if st.button("🔎 Ejecutar revisión"):
+        hojas = {h: cargar_datos(h) for h in HOJAS_REVISADAS}
+        df_prob = verificar_integridad(hojas)
+        if df_prob.empty:
+            st.success("✅ No se encontraron inconsistencias.")
+        else:
+            st.error(f"Se encontraron {len(df_prob)} inconsistencias.")
+            resumen = df_prob.groupby("tipo").size().reset_index(name="Registros")
+            st.table(resumen.rename(columns={"tipo": "Tipo"}))
+            st.dataframe(
+                df_prob.rename(columns={"tipo": "Tipo", "hoja": "Pestaña", "id_registro": "ID", "detalle": "Detalle"}),
+                use_container_width=True,
+                hide_index=True,
+            )
@@ -0,0 +1,153 @@
+import streamlit as st
+import pandas as pd
+
+from modulos.desarrollos import indice_compartido, actualizar_indice, leer_hoja
+
+ESTATUS_LOTE = ["Disponible", "Vendido", "Apartado", "Bloqueado"]
+ICONOS_ESTATUS = {"Disponible": "🟢", "Vendido": "🔴", "Apartado": "🟡", "Bloqueado": "⚫"}
+
+# --- ÍNDICE DE DISPONIBILIDAD (fase -> manzana -> lotes) ---
+# Se construye una sola vez por versión de la pestaña ubicaciones y lo comparten todas las sesiones.
+# Al guardar un lote (alta, cambio de estatus, fase o precio, baja) se corrige solo ese lote.
+
+def _datos_inventario(df_u):
+    col_precio = "precio" if "precio" in df_u.columns else ("costo" if "costo" in df_u.columns else None)
+    fase = df_u["fase"].fillna("").astype(str).str.strip() if "fase" in df_u.columns else pd.Series("", index=df_u.index)
+    return pd.DataFrame({
+        "ubicacion": df_u["ubicacion"].astype(str),
+        "fase": fase.replace("", "Sin fase"),
+        "manzana": pd.to_numeric(df_u["manzana"], errors="coerce").fillna(0).astype(int) if "manzana" in df_u.columns else 0,
+        "lote": pd.to_numeric(df_u["lote"], errors="coerce").fillna(0).astype(int) if "lote" in df_u.columns else 0,
+        "precio": pd.to_numeric(df_u[col_precio], errors="coerce").fillna(0.0) if col_precio else 0.0,
+        "estatus": df_u["estatus"].fillna("Disponible").astype(str) if "estatus" in df_u.columns else "Disponible",
+    }, index=df_u.index)
+
+
+def construir_indice_inventario(df_u):
+    indice = {"lotes": {}, "grupos": {}}
+    if df_u.empty or "ubicacion" not in df_u.columns:
+        return indice
+
+    datos = _datos_inventario(df_u)
+    grupos = list(zip(datos["fase"], datos["manzana"]))
+    indice["lotes"] = {
+        ubi: {"grupo": g, "lote": lote, "precio": precio, "estatus": estatus}
+        for ubi, g, lote, precio, estatus in zip(datos["ubicacion"], grupos, datos["lote"].tolist(), datos["precio"].tolist(), datos["estatus"])
+    }
+    conjuntos = datos.groupby(["fase", "manzana", "estatus"])["ubicacion"].agg(set)
+    for (fase, manzana), total in datos.groupby(["fase", "manzana"]).size().items():
+        indice["grupos"][(fase, manzana)] = {"por_estatus": conjuntos.loc[(fase, manzana)].to_dict(), "total": int(total)}
+    return indice
+
+
+def obtener_indice_inventario(df_u, URL_SHEET):
+    return indice_compartido("inventario", URL_SHEET, lambda: construir_indice_inventario(df_u), df_u)
+
+
+def _con_lote(indice, ubicacion, fila):
+    # Copia superficial: solo se reemplazan el lote y su grupo (las otras sesiones siguen leyendo el índice anterior)
+    lotes, grupos = dict(indice["lotes"]), dict(indice["grupos"])
+    anterior = lotes.pop(ubicacion, None)
+    if anterior is not None:
+        g = grupos[anterior["grupo"]]
+        por_estatus = {**g["por_estatus"], anterior["estatus"]: g["por_estatus"].get(anterior["estatus"], set()) - {ubicacion}}
+        grupos[anterior["grupo"]] = {"por_estatus": por_estatus, "total": g["total"] - 1}
+        if g["total"] == 1:
+            del grupos[anterior["grupo"]]
+    if fila is not None:
+        clave = (fila["fase"], int(fila["manzana"]))
+        lotes[ubicacion] = {"grupo": clave, "lote": int(fila["lote"]), "precio": float(fila["precio"]), "estatus": fila["estatus"]}
+        g = grupos.get(clave, {"por_estatus": {}, "total": 0})
+        por_estatus = {**g["por_estatus"], fila["estatus"]: g["por_estatus"].get(fila["estatus"], set()) | {ubicacion}}
+        grupos[clave] = {"por_estatus": por_estatus, "total": g["total"] + 1}
+    return {"lotes": lotes, "grupos": grupos}
+
+
+def actualizar_lote(URL_SHEET, version_leida, version_escrita, df_u, ubicacion):
+    # Llamar después de guardar df_u; si la ubicación ya no está en df_u se quita del índice
+    filas = _datos_inventario(df_u[df_u["ubicacion"].astype(str) == str(ubicacion)])
+    fila = filas.iloc[-1] if not filas.empty else None
+    actualizar_indice("inventario", URL_SHEET, "ubicaciones", version_leida, version_escrita,
+                      lambda indice: _con_lote(indice, str(ubicacion), fila))
+
+
+def lote_disponible(conn, URL_SHEET, ubicacion):
+    # Verificación al vender: la versión vigente de la pestaña, no la del render en que se eligió el lote
+    df_u = leer_hoja(conn, URL_SHEET, "ubicaciones")
+    estatus = df_u.loc[df_u["ubicacion"].astype(str) == str(ubicacion), "estatus"] if "estatus" in df_u.columns else pd.Series(dtype=str)
+    return not estatus.empty and (estatus.fillna("Disponible") == "Disponible").all()
+# --- CONSULTAS SOBRE EL ÍNDICE ---
+def fases_disponibles(indice):
+    return sorted({fase for (fase, _), g in indice["grupos"].items() if g["por_estatus"].get("Disponible")})
+
+
+def manzanas_disponibles(indice, fase):
+    return sorted(m for (f, m), g in indice["grupos"].items() if f == fase and g["por_estatus"].get("Disponible"))
+
+
+def lotes_disponibles(indice, fase=None, manzana=None):
+    lotes = []
+    for (f, m), g in indice["grupos"].items():
+        if (fase is None or f == fase) and (manzana is None or m == manzana):
+            lotes.extend(g["por_estatus"].get("Disponible", ()))
+    return sorted(lotes, key=lambda u: (indice["lotes"][u]["grupo"], indice["lotes"][u]["lote"], u))
+
+
+def resumen_por_manzana(indice):
+    filas = []
+    for (fase, manzana), g in sorted(indice["grupos"].items()):
+        disponibles = g["por_estatus"].get("Disponible", set())
+        precios_libres = [indice["lotes"][u]["precio"] for u in disponibles]
+        filas.append({
+            "Fase": fase,
+            "Manzana": manzana,
+            "Total": g["total"],
+            **{e: len(g["por_estatus"].get(e, ())) for e in ESTATUS_LOTE},
+            "Precio Mín.": min(precios_libres) if precios_libres else None,
+            "Precio Máx.": max(precios_libres) if precios_libres else None,
+        })
+    return pd.DataFrame(filas)
+
+
+def mapa_fase(indice, fase):
+    # Cuadrícula manzana x lote con el icono de estatus de cada ubicación
+    celdas = [
+        {"Manzana": info["grupo"][1], "Lote": info["lote"], "icono": ICONOS_ESTATUS.get(info["estatus"], "⚪")}
+        for info in indice["lotes"].values() if info["grupo"][0] == fase
+    ]
+    if not celdas:
+        return pd.DataFrame()
+    df_mapa = pd.DataFrame(celdas).pivot_table(index="Manzana", columns="Lote", values="icono", aggfunc="first")
+    df_mapa.columns = [f"L{str(c).zfill(2)}" for c in df_mapa.columns]
+    df_mapa.index = [f"M{str(m).zfill(2)}" for m in df_mapa.index]
+    return df_mapa.fillna("")
+
+
+# --- VISTA DE MAPA DEL DESARROLLO ---
+def render_mapa_inventario(indice, fmt_moneda):
+    if not indice["lotes"]:
+        st.info("No hay lotes registrados en el inventario.")
+        return
+
+    df_resumen = resumen_por_manzana(indice)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Lotes Totales", int(df_resumen["Total"].sum()))
+    c2.metric("Disponibles", int(df_resumen["Disponible"].sum()))
+    c3.metric("Vendidos", int(df_resumen["Vendido"].sum()))
+
+    fases = sorted({f for f, _ in indice["grupos"]})
+    fase_sel = st.selectbox("🏗️ Fase", fases, key="mapa_fase")
+
+    st.caption(" · ".join(f"{icono} {estatus}" for estatus, icono in ICONOS_ESTATUS.items()))
+    st.dataframe(mapa_fase(indice, fase_sel), use_container_width=True)
+
+    st.write("#### 📊 Disponibilidad por Manzana")
+    df_fase = df_resumen[df_resumen["Fase"] == fase_sel].drop(columns=["Fase"])
+    st.dataframe(
+        df_fase.style.format({
+            "Precio Mín.": lambda x: fmt_moneda(x) if pd.notna(x) else "-",
+            "Precio Máx.": lambda x: fmt_moneda(x) if pd.notna(x) else "-",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
@@ -0,0 +1,93 @@
+import pandas as pd
+import numpy as np
+
+# --- MOTOR DE CRÉDITO ---
+# Fórmulas vectorizadas: reciben escalares o arreglos (uno por contrato / por cuota).
+# Con tasa 0, sin gracia y sin pago final se obtiene (precio_total - enganche) / plazo_meses,
+# igual que los contratos sin interés que ya existen.
+
+TIPOS_INTERES = ["Sin interés", "Francés", "Plano"]
+
+# Columnas opcionales de la pestaña de ventas y su valor por defecto
+TERMINOS_DEFECTO = {
+    "tipo_interes": "Sin interés",
+    "tasa_anual": 0.0,
+    "meses_gracia": 0,
+    "pago_final": 0.0,
+    "recargo_mora": 0.0,
+}
+
+
+def terminos_credito(df_v):
+    # Devuelve las condiciones de cada contrato con los valores por defecto aplicados
+    terminos = pd.DataFrame(index=df_v.index)
+    for col, defecto in TERMINOS_DEFECTO.items():
+        if col not in df_v.columns:
+            terminos[col] = defecto
+        elif isinstance(defecto, str):
+            terminos[col] = df_v[col].where(df_v[col].isin(TIPOS_INTERES), defecto)
+        else:
+            terminos[col] = pd.to_numeric(df_v[col], errors="coerce").fillna(defecto).clip(lower=0)
+    terminos["meses_gracia"] = terminos["meses_gracia"].astype(int)
+    return terminos
+
+
+def tasa_mensual(tipo, tasa_anual):
+    tipo = np.asarray(tipo)
+    return np.where(tipo == "Sin interés", 0.0, np.asarray(tasa_anual, dtype=float) / 100 / 12)
+
+
+def capital_inicial(financiado, tipo, tasa_anual, meses_gracia):
+    # En el periodo de gracia el sistema francés capitaliza intereses; el plano y el sin interés no
+    r = tasa_mensual(tipo, tasa_anual)
+    capitaliza = np.asarray(tipo) == "Francés"
+    return np.where(capitaliza, np.asarray(financiado, dtype=float) * (1 + r) ** np.asarray(meses_gracia), financiado)
+
+
+def calcular_cuota(financiado, plazo, tipo="Sin interés", tasa_anual=0.0, meses_gracia=0, pago_final=0.0):
+    plazo = np.maximum(np.asarray(plazo, dtype=float), 1)
+    r = tasa_mensual(tipo, tasa_anual)
+    capital = capital_inicial(financiado, tipo, tasa_anual, meses_gracia)
+    final = np.asarray(pago_final, dtype=float)
+    tipo = np.asarray(tipo)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = (1 + r) ** plazo
+        frances = (capital - final / factor) * r / (1 - 1 / factor)
+    sin_interes = (capital - final) / plazo
+    plano = (capital - final) / plazo + capital * r
+
+    cuota = np.select(
+        [(tipo == "Francés") & (r > 0), (tipo == "Plano") & (r > 0)],
+        [frances, plano],
+        default=sin_interes,
+    )
+    # Se cobra en centavos: una cuota sin redondear deja fracciones que marcan la cuota como parcial
+    return np.round(np.maximum(cuota, 0.0), 2)
+
+
+def saldo_despues_de(k, financiado, plazo, cuota, tipo="Sin interés", tasa_anual=0.0, meses_gracia=0, pago_final=0.0):
+    # Capital pendiente después de k cuotas regulares (el pago final liquida el saldo en la última)
+    k = np.asarray(k, dtype=float)
+    r = tasa_mensual(tipo, tasa_anual)
+    capital = capital_inicial(financiado, tipo, tasa_anual, meses_gracia)
+    final = np.asarray(pago_final, dtype=float)
+    tipo = np.asarray(tipo)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crecimiento = (1 + r) ** k
+        frances = capital * crecimiento - np.asarray(cuota) * (crecimiento - 1) / r
+    amortizado = (capital - final) / np.maximum(np.asarray(plazo, dtype=float), 1) * k
+    lineal = capital - np.where(tipo == "Plano", amortizado, np.asarray(cuota) * k)
+
+    # Con interés el último pago liquida el saldo; sin interés se conserva la diferencia por redondeo
+    # de la mensualidad guardada (igual que el cálculo original de los contratos sin interés)
+    final_pagado = np.where(k >= np.asarray(plazo), final, 0.0)
+    saldo = np.where((tipo == "Francés") & (r > 0), frances, lineal)
+    saldo = np.where(k >= np.asarray(plazo), np.where(tipo == "Sin interés", lineal - final_pagado, 0.0), saldo)
+    return np.maximum(saldo, 0.0)
+
+
+def recargos_mora(monto_cuota, meses_atraso, recargo_mora):
+    # Porcentaje de la cuota por cada mes o fracción que tardó en cubrirse
+    return np.asarray(monto_cuota, dtype=float) * np.asarray(meses_atraso) * np.asarray(recargo_mora, dtype=float) / 100
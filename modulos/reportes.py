@@ -1,8 +1,20 @@
 import streamlit as st
 import pandas as pd
+from modulos.cartera import cuotas_cartera_activa, flujo_proyectado, tasa_cobranza_historica
 
 def render_reportes(df_v, df_p, df_g, fmt_moneda):
     st.title("📈 Reportes Financieros")
+
+    tab_resumen, tab_flujo = st.tabs(["📊 Resumen", "🔮 Flujo Proyectado"])
+
+    with tab_resumen:
+        render_resumen_financiero(df_v, df_p, df_g, fmt_moneda)
+
+    with tab_flujo:
+        render_flujo_proyectado(df_v, df_p, fmt_moneda)
+
+
+def render_resumen_financiero(df_v, df_p, df_g, fmt_moneda):
     st.info("Resumen general de ingresos, gastos y utilidad neta.")
 
     # Validar que existan datos
@@ -66,3 +78,51 @@ def render_reportes(df_v, df_p, df_g, fmt_moneda):
     # Listado de Gastos Recientes
     with st.expander("Ver últimos gastos registrados"):
         st.dataframe(df_g.tail(10), use_container_width=True, hide_index=True)
+
+
+def render_flujo_proyectado(df_v, df_p, fmt_moneda):
+    st.info("Cobranza esperada de los contratos activos según su calendario de pagos.")
+
+    if df_v.empty:
+        st.warning("Se requieren ventas registradas para proyectar la cobranza.")
+        return
+
+    c1, c2, c3 = st.columns(3)
+    horizonte = c1.radio("Horizonte", [3, 6, 12], index=2, horizontal=True, format_func=lambda m: f"{m} meses")
+    incluir_atrasos = c2.toggle("Incluir atrasos en el mes actual", value=True)
+    usar_tasa = c3.toggle("Aplicar tasa histórica de cobranza", value=False)
+
+    # Una sola cartera (contratos activos) para la tasa histórica y la proyección
+    df_cuotas = cuotas_cartera_activa(df_v, df_p)
+    tasa = None
+    if usar_tasa:
+        tasa = tasa_cobranza_historica(df_cuotas, df_p)
+        if tasa is None:
+            st.warning("No hay historial suficiente para calcular la tasa de cobranza.")
+        else:
+            st.caption(f"Tasa de cobranza de los últimos 12 meses: {tasa:.1%}")
+
+    df_flujo = flujo_proyectado(df_cuotas, meses=horizonte, incluir_atrasos=incluir_atrasos, tasa=tasa)
+
+    k1, k2, k3 = st.columns(3)
+    k1.metric("Programado", fmt_moneda(df_flujo["programado"].sum()))
+    k2.metric("Atrasos por Recuperar", fmt_moneda(df_flujo["atrasos"].sum()))
+    k3.metric("Total Esperado", fmt_moneda(df_flujo["ajustado"].sum()))
+
+    st.bar_chart(df_flujo.set_index(df_flujo["mes"].dt.strftime('%Y-%m'))[["programado", "atrasos"]])
+
+    df_visual = df_flujo.rename(columns={
+        "mes": "Mes", "programado": "Programado", "atrasos": "Atrasos",
+        "esperado": "Esperado", "ajustado": "Esperado (ajustado)",
+    })
+    st.dataframe(
+        df_visual.style.format({
+            "Mes": lambda t: t.strftime('%b-%Y'),
+            "Programado": "$ {:,.2f}",
+            "Atrasos": "$ {:,.2f}",
+            "Esperado": "$ {:,.2f}",
+            "Esperado (ajustado)": "$ {:,.2f}",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
@@ -0,0 +1,142 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+from modulos.cartera import contratos_activos, resumen_cartera
+
+# --- AGREGADOS DEL TABLERO ---
+# Las gráficas reciben tablas de pocas filas (una por mes / fase / vendedor),
+# nunca las pestañas completas: se dibujan igual de rápido con años de historial.
+
+def _monto(serie):
+    return pd.to_numeric(serie, errors="coerce").fillna(0.0)
+
+
+def cobranza_mensual(df_p):
+    if df_p.empty or not {"fecha", "monto"}.issubset(df_p.columns):
+        return pd.DataFrame(columns=["mes", "cobrado"])
+    pagos = pd.DataFrame({"fecha": pd.to_datetime(df_p["fecha"], errors="coerce"), "cobrado": _monto(df_p["monto"])}).dropna(subset=["fecha"])
+    return (
+        pagos.groupby(pagos["fecha"].dt.to_period("M"))["cobrado"].sum()
+        .rename_axis("mes").reset_index()
+        .assign(mes=lambda d: d["mes"].dt.to_timestamp())
+    )
+
+
+def ventas_por(df_v, columna, df_u=None):
+    # columna "fase" se toma del inventario (ubicaciones); "vendedor" directamente de ventas
+    if df_v.empty:
+        return pd.DataFrame(columns=[columna, "ventas", "importe"])
+    ventas = pd.DataFrame({"ubicacion": df_v["ubicacion"].astype(str), "importe": _monto(df_v["precio_total"])})
+    if columna == "fase":
+        fases = df_u.set_index(df_u["ubicacion"].astype(str))["fase"] if df_u is not None and "fase" in df_u.columns else pd.Series(dtype=str)
+        ventas[columna] = ventas["ubicacion"].map(fases[~fases.index.duplicated()])
+    else:
+        ventas[columna] = df_v[columna].values if columna in df_v.columns else None
+    ventas[columna] = ventas[columna].fillna("Sin asignar").astype(str).replace("", "Sin asignar")
+    return (
+        ventas.groupby(columna).agg(ventas=("ubicacion", "size"), importe=("importe", "sum"))
+        .reset_index().sort_values("importe", ascending=False)
+    )
+
+
+def avance_inventario(df_u):
+    if df_u.empty or "estatus" not in df_u.columns:
+        return pd.DataFrame(columns=["fase", "estatus", "lotes"])
+    lotes = pd.DataFrame({
+        "fase": df_u["fase"].fillna("Sin fase").astype(str) if "fase" in df_u.columns else "Sin fase",
+        "estatus": df_u["estatus"].fillna("Disponible").astype(str),
+    })
+    return lotes.groupby(["fase", "estatus"]).size().rename("lotes").reset_index()
+
+
+def tendencia_atrasos(df_v, df_p, meses=12, hoy=None):
+    # Saldo vencido al cierre de cada mes: un cálculo vectorizado de cartera por corte,
+    # tomando solo los pagos registrados hasta esa fecha
+    activos = contratos_activos(df_v)
+    if activos.empty:
+        return pd.DataFrame(columns=["mes", "vencido", "contratos_atrasados"])
+    hoy = pd.Timestamp(hoy or pd.Timestamp.now())
+    fechas_p = pd.to_datetime(df_p["fecha"], errors="coerce") if "fecha" in df_p.columns else None
+    filas = []
+    for mes in pd.period_range(end=hoy, periods=meses, freq="M"):
+        corte = min(mes.to_timestamp(how="end"), hoy)
+        df_res = resumen_cartera(activos, df_p[fechas_p <= corte] if fechas_p is not None else df_p, hoy=corte)
+        existentes = df_res["fecha"] <= corte
+        filas.append((mes.to_timestamp(), df_res.loc[existentes, "saldo_vencido"].sum(), int((df_res.loc[existentes, "saldo_vencido"] > 0.01).sum())))
+    return pd.DataFrame(filas, columns=["mes", "vencido", "contratos_atrasados"])
+
+
+@st.cache_data(ttl=3600, max_entries=20)
+def agregados_tablero(df_v, df_p, df_u):
+    # La tendencia de atrasos (doce cortes de cartera) la calculan las tareas nocturnas
+    return {
+        "cobranza": cobranza_mensual(df_p),
+        "ventas_fase": ventas_por(df_v, "fase", df_u),
+        "ventas_vendedor": ventas_por(df_v, "vendedor"),
+        "inventario": avance_inventario(df_u),
+    }
+
+
+# --- VISTA ---
+def render_tablero(df_v, df_p, df_u, df_atrasos):
+    ag = agregados_tablero(df_v, df_p, df_u)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**💵 Cobranza por Mes**")
+        if ag["cobranza"].empty:
+            st.info("Sin pagos registrados.")
+        else:
+            fig = px.bar(ag["cobranza"], x="mes", y="cobrado", labels={"mes": "Mes", "cobrado": "Cobrado"})
+            fig.update_layout(height=320, margin=dict(l=0, r=0, t=10, b=0))
+            st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        st.markdown("**⚠️ Tendencia de Atrasos**")
+        if df_atrasos is None:
+            st.info("La tendencia se está calculando con las tareas nocturnas.")
+        elif df_atrasos.empty:
+            st.info("Sin contratos activos.")
+        else:
+            fig = px.line(
+                df_atrasos, x="mes", y="vencido", markers=True, hover_data=["contratos_atrasados"],
+                labels={"mes": "Cierre de mes", "vencido": "Saldo vencido", "contratos_atrasados": "Contratos atrasados"},
+            )
+            fig.update_layout(height=320, margin=dict(l=0, r=0, t=10, b=0))
+            st.plotly_chart(fig, use_container_width=True)
+
+    col3, col4 = st.columns(2)
+    with col3:
+        st.markdown("**🏗️ Ventas por Fase**")
+        if ag["ventas_fase"].empty:
+            st.info("Sin ventas registradas.")
+        else:
+            fig = px.bar(ag["ventas_fase"], x="fase", y="importe", text="ventas", labels={"fase": "Fase", "importe": "Importe", "ventas": "Ventas"})
+            fig.update_layout(height=320, margin=dict(l=0, r=0, t=10, b=0))
+            st.plotly_chart(fig, use_container_width=True)
+    with col4:
+        st.markdown("**👔 Ventas por Vendedor**")
+        if ag["ventas_vendedor"].empty:
+            st.info("Sin ventas registradas.")
+        else:
+            fig = px.bar(
+                ag["ventas_vendedor"], x="importe", y="vendedor", orientation="h", text="ventas",
+                labels={"vendedor": "Vendedor", "importe": "Importe", "ventas": "Ventas"},
+            )
+            fig.update_layout(height=320, margin=dict(l=0, r=0, t=10, b=0), yaxis={"categoryorder": "total ascending"})
+            st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("**📦 Avance de Inventario por Fase**")
+    if ag["inventario"].empty:
+        st.info("Sin lotes registrados.")
+    else:
+        inv = ag["inventario"]
+        totales = inv.groupby("fase")["lotes"].transform("sum")
+        inv = inv.assign(porcentaje=inv["lotes"] / totales)
+        fig = px.bar(
+            inv, x="porcentaje", y="fase", color="estatus", orientation="h", hover_data=["lotes"],
+            labels={"porcentaje": "% de lotes", "fase": "Fase", "estatus": "Estatus", "lotes": "Lotes"},
+            color_discrete_map={"Disponible": "#2ecc71", "Vendido": "#e74c3c", "Apartado": "#f1c40f", "Bloqueado": "#7f8c8d"},
+        )
+        fig.update_layout(height=300, margin=dict(l=0, r=0, t=10, b=0), xaxis_tickformat=".0%")
+        st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import streamlit as st
+import pandas as pd
+
+from modulos.cartera import contratos_activos, resumen_cartera
+from modulos.configuracion import leer_configuracion
+from modulos.tableros import tendencia_atrasos
+
+HORA_NOCTURNA = int(leer_configuracion("hora_tareas_nocturnas", 2))
+DIR_RESPALDOS = leer_configuracion("dir_respaldos", "respaldos")
+HOJAS_RESPALDO = ["ventas", "pagos", "clientes", "ubicaciones", "gastos", "vendedores"]
+
+# --- ALMACÉN COMPARTIDO ---
+# Un diccionario por desarrollo (libro) y por proceso: las páginas leen de aquí sin recalcular.
+
+@st.cache_resource
+def almacen_tareas(URL_SHEET):
+    return {"lock": threading.Lock(), "resultados": {}, "ultima_ejecucion": None, "error": None}
+
+
+def resultado_tarea(URL_SHEET, nombre):
+    almacen = almacen_tareas(URL_SHEET)
+    with almacen["lock"]:
+        return almacen["resultados"].get(nombre)
+
+
+def ultima_ejecucion(URL_SHEET):
+    return almacen_tareas(URL_SHEET)["ultima_ejecucion"]
+
+
+# --- TAREAS NOCTURNAS ---
+def _leer(conn, URL_SHEET, hoja):
+    # Una pestaña que no existe cuenta como vacía (como en cargar_datos). Cualquier otro error interrumpe
+    # la corrida antes de tocar el almacén y se conservan los resultados de la última corrida completa.
+    # gspread es dependencia opcional del conector: su excepción se reconoce por nombre
+    try:
+        return conn.read(spreadsheet=URL_SHEET, worksheet=hoja, ttl=0)
+    except Exception as e:
+        if type(e).__name__ == "WorksheetNotFound":
+            return pd.DataFrame()
+        raise
+
+
+def contactos_con_atraso(df_res, df_cl):
+    atrasados = df_res[df_res["saldo_vencido"] > 0.01]
+    columnas = ["ubicacion", "cliente", "saldo_vencido", "num_atrasos", "recargos_pendientes"]
+    df_contactos = atrasados[[c for c in columnas if c in atrasados.columns]].rename(columns={"recargos_pendientes": "recargos"})
+    if not df_cl.empty and "nombre" in df_cl.columns:
+        contacto = df_cl.drop_duplicates("nombre").set_index("nombre")
+        for col in ["telefono", "correo"]:
+            if col in contacto.columns:
+                df_contactos = df_contactos.assign(**{col: df_contactos["cliente"].map(contacto[col]).fillna("")})
+    return df_contactos.sort_values("saldo_vencido", ascending=False).reset_index(drop=True)
+
+
+def respaldar_hojas(hojas, fecha, subcarpeta=""):
+    carpeta = os.path.join(DIR_RESPALDOS, subcarpeta, fecha.strftime('%Y-%m-%d'))
+    os.makedirs(carpeta, exist_ok=True)
+    for nombre, df in hojas.items():
+        df.to_csv(os.path.join(carpeta, f"{nombre}.csv.gz"), index=False, compression="gzip")
+    return carpeta
+
+
+def _id_libro(URL_SHEET):
+    # ".../spreadsheets/d/<id>/" -> "<id>": separa los respaldos de cada desarrollo
+    partes = URL_SHEET.rstrip("/").split("/")
+    return partes[partes.index("d") + 1] if "d" in partes[:-1] else partes[-1]
+
+
+def ejecutar_tareas(conn, URL_SHEET):
+    ahora = datetime.now()
+    hojas = {h: _leer(conn, URL_SHEET, h) for h in HOJAS_RESPALDO}
+    df_v, df_p = hojas["ventas"], hojas["pagos"]
+
+    resultados = {}
+    if not df_v.empty:
+        df_res = resumen_cartera(contratos_activos(df_v), df_p, hoy=ahora)
+        resultados["cartera"] = df_res
+        resultados["resumen"] = {
+            "contratos": len(df_res),
+            "por_cobrar": float(df_res["saldo_restante"].sum()),
+            "vencido": float(df_res["saldo_vencido"].sum()),
+            "contratos_atrasados": int((df_res["saldo_vencido"] > 0.01).sum()),
+            "recargos": float(df_res["recargos_pendientes"].sum()),
+        }
+        resultados["contactos_atraso"] = contactos_con_atraso(df_res, hojas["clientes"])
+        # Doce cortes de cartera: fuera del render del tablero
+        resultados["atrasos"] = tendencia_atrasos(df_v, df_p, hoy=ahora)
+    resultados["respaldo"] = respaldar_hojas({h: df for h, df in hojas.items() if not df.empty}, ahora, _id_libro(URL_SHEET))
+
+    almacen = almacen_tareas(URL_SHEET)
+    with almacen["lock"]:
+        almacen["resultados"] = resultados
+        almacen["ultima_ejecucion"] = ahora
+        almacen["error"] = None
+
+
+def _proxima_ejecucion(ahora):
+    siguiente = ahora.replace(hour=HORA_NOCTURNA, minute=0, second=0, microsecond=0)
+    return siguiente if siguiente > ahora else siguiente + timedelta(days=1)
+
+
+def ejecutar_o_registrar(conn, URL_SHEET):
+    try:
+        ejecutar_tareas(conn, URL_SHEET)
+        return True
+    except Exception as e:
+        almacen_tareas(URL_SHEET)["error"] = f"{datetime.now():%Y-%m-%d %H:%M} {e}"
+        return False
+
+
+def _ciclo(conn, URL_SHEET):
+    while True:
+        ejecutar_o_registrar(conn, URL_SHEET)
+        time.sleep(max(60, (_proxima_ejecucion(datetime.now()) - datetime.now()).total_seconds()))
+
+
+@st.cache_resource
+def iniciar_programador(_conn, URL_SHEET):
+    # Un solo hilo por desarrollo y por proceso (cache_resource): corre al arrancar y después cada noche a HORA_NOCTURNA
+    hilo = threading.Thread(target=_ciclo, args=(_conn, URL_SHEET), name="tareas-nocturnas", daemon=True)
+    hilo.start()
+    return hilo
+
+
+# --- VISTA ---
+def render_estado_tareas(conn, URL_SHEET):
+    ultima = ultima_ejecucion(URL_SHEET)
+    error = almacen_tareas(URL_SHEET)["error"]
+    c1, c2 = st.columns([3, 1])
+    if ultima:
+        c1.caption(f"🕑 Datos precalculados al {ultima:%d-%b-%Y %H:%M}")
+    else:
+        c1.caption("🕑 Los datos precalculados aún se están generando.")
+    if error:
+        c1.caption(f"⚠️ Última falla: {error}")
+    if c2.button("🔄 Recalcular ahora", key="btn_tareas"):
+        with st.spinner("Recalculando cartera..."):
+            completado = ejecutar_o_registrar(conn, URL_SHEET)
+        if completado:
+            st.rerun()
+        st.error(f"No se pudo recalcular; se muestran los últimos datos. {almacen_tareas(URL_SHEET)['error']}")
@@ -1,22 +1,36 @@
 import streamlit as st
 import pandas as pd
+from modulos.auditoria import guardar_hoja
+from modulos.desarrollos import version_de
+from modulos.integridad import proximo_id, reservar_ids
+from modulos.inventario import (
+    ESTATUS_LOTE, obtener_indice_inventario, actualizar_lote, render_mapa_inventario
+)
 
-def render_ubicaciones(df_u, conn, URL_SHEET, cargar_datos):
+def render_ubicaciones(df_u, conn, URL_SHEET, cargar_datos, fmt_moneda):
     st.title("📍 Control de Inventario")
+    indice = obtener_indice_inventario(df_u, URL_SHEET)
+    _, version_u = version_de(df_u)
     
-    # --- FILTRO TIPO SWITCH (Activo por defecto) ---
     st.write("### 🔍 Vista de Inventario")
-    ocultar_vendidos = st.toggle("Ocultar Lotes Vendidos", value=True)
+    vista_mapa, vista_tabla = st.tabs(["🗺️ Mapa del Desarrollo", "📋 Tabla"])
 
-    df_mostrar = df_u.copy()
-    if ocultar_vendidos:
-        df_mostrar = df_u[df_u["estatus"] == "Disponible"]
+    with vista_mapa:
+        render_mapa_inventario(indice, fmt_moneda)
 
-    # Selección de columnas visibles para el usuario (ID oculto)
-    columnas_visibles = ["ubicacion", "fase", "manzana", "lote", "precio", "estatus"]
-    cols_existentes = [c for c in columnas_visibles if c in df_mostrar.columns]
-    
-    st.dataframe(df_mostrar[cols_existentes], use_container_width=True, hide_index=True)
+    with vista_tabla:
+        # --- FILTRO TIPO SWITCH (Activo por defecto) ---
+        ocultar_vendidos = st.toggle("Ocultar Lotes Vendidos", value=True)
+
+        df_mostrar = df_u.copy()
+        if ocultar_vendidos:
+            df_mostrar = df_u[df_u["estatus"] == "Disponible"]
+
+        # Selección de columnas visibles para el usuario (ID oculto)
+        columnas_visibles = ["ubicacion", "fase", "manzana", "lote", "precio", "estatus"]
+        cols_existentes = [c for c in columnas_visibles if c in df_mostrar.columns]
+        
+        st.dataframe(df_mostrar[cols_existentes], use_container_width=True, hide_index=True)
 
     tab_nueva, tab_editar = st.tabs(["✨ Agregar Ubicación", "✏️ Editar Registro"])
 
@@ -33,20 +47,15 @@ def render_ubicaciones(df_u, conn, URL_SHEET, cargar_datos):
             f_fase = c1.text_input("🏗️ Fase / Etapa", placeholder="Ej: Fase 1")
             f_pre = c2.number_input("💵 Precio de Lista ($)", min_value=0.0, step=1000.0)
             
-            # Generación de ID automática
-            nuevo_id_sugerido = 1
-            if not df_u.empty and "id_lote" in df_u.columns:
-                try:
-                    nuevo_id_sugerido = int(float(df_u["id_lote"].max())) + 1
-                except:
-                    nuevo_id_sugerido = len(df_u) + 1
+            # Generación de ID automática (secuencia persistente; se reserva al guardar)
+            nuevo_id_sugerido = proximo_id(conn, URL_SHEET, "ubicaciones", df_u, "id_lote")
             
             nombre_gen = f"M{str(f_manzana).zfill(2)}-L{str(f_lote).zfill(2)}"
             st.info(f"💡 Ubicación a registrar: **{nombre_gen}** (ID interno: {nuevo_id_sugerido})")
 
             if st.form_submit_button("➕ AGREGAR AL INVENTARIO"):
                 nueva_fila = pd.DataFrame([{
-                    "id_lote": nuevo_id_sugerido,
+                    "id_lote": reservar_ids(conn, URL_SHEET, "ubicaciones", df_u, "id_lote"),
                     "ubicacion": nombre_gen,
                     "manzana": f_manzana,
                     "lote": f_lote,
@@ -56,8 +65,8 @@ def render_ubicaciones(df_u, conn, URL_SHEET, cargar_datos):
                 }])
                 
                 df_u = pd.concat([df_u, nueva_fila], ignore_index=True)
-                conn.update(spreadsheet=URL_SHEET, worksheet="ubicaciones", data=df_u)
-                st.success(f"✅ Lote {nombre_gen} agregado."); st.cache_data.clear(); st.rerun()
+                actualizar_lote(URL_SHEET, version_u, guardar_hoja(conn, URL_SHEET, "ubicaciones", df_u), df_u, nombre_gen)
+                st.success(f"✅ Lote {nombre_gen} agregado."); st.rerun()
 
     # ---------------------------------------------------------
     # PESTAÑA 2: EDITAR REGISTROS
@@ -76,17 +85,17 @@ def render_ubicaciones(df_u, conn, URL_SHEET, cargar_datos):
                     st.write(f"✏️ Editando: **{row['ubicacion']}**")
                     ce1, ce2 = st.columns(2)
                     e_pre = ce1.number_input("Precio Actualizado ($)", min_value=0.0, value=float(row.get("precio", 0.0)))
-                    e_est = ce2.selectbox("Estatus", ["Disponible", "Vendido", "Apartado", "Bloqueado"], 
-                                         index=["Disponible", "Vendido", "Apartado", "Bloqueado"].index(row["estatus"]))
+                    e_est = ce2.selectbox("Estatus", ESTATUS_LOTE, 
+                                         index=ESTATUS_LOTE.index(row["estatus"]) if row["estatus"] in ESTATUS_LOTE else 0)
                     e_fas = ce1.text_input("Fase", value=str(row.get("fase", "")))
                     
                     cb1, cb2 = st.columns(2)
                     if cb1.form_submit_button("💾 GUARDAR CAMBIOS"):
                         df_u.at[idx, "precio"], df_u.at[idx, "estatus"], df_u.at[idx, "fase"] = e_pre, e_est, e_fas
-                        conn.update(spreadsheet=URL_SHEET, worksheet="ubicaciones", data=df_u)
-                        st.success("Cambios guardados."); st.cache_data.clear(); st.rerun()
+                        actualizar_lote(URL_SHEET, version_u, guardar_hoja(conn, URL_SHEET, "ubicaciones", df_u), df_u, row["ubicacion"])
+                        st.success("Cambios guardados."); st.rerun()
                         
                     if cb2.form_submit_button("🗑️ ELIMINAR"):
                         df_u = df_u.drop(idx)
-                        conn.update(spreadsheet=URL_SHEET, worksheet="ubicaciones", data=df_u)
-                        st.error("Ubicación eliminada."); st.cache_data.clear(); st.rerun()
+                        actualizar_lote(URL_SHEET, version_u, guardar_hoja(conn, URL_SHEET, "ubicaciones", df_u), df_u, row["ubicacion"])
+                        st.error("Ubicación eliminada."); st.rerun()
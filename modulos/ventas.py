@@ -1,6 +1,15 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from modulos.auditoria import guardar_hoja
+from modulos.desarrollos import version_de
+from modulos.integridad import reservar_ids
+from modulos.comisiones import aplicar_venta
+from modulos.motor_credito import TIPOS_INTERES, calcular_cuota, terminos_credito
+from modulos.busqueda import obtener_indice_clientes, buscar_clientes, posibles_duplicados, aviso_duplicados
+from modulos.inventario import (
+    obtener_indice_inventario, actualizar_lote, lote_disponible, fases_disponibles, manzanas_disponibles, lotes_disponibles
+)
 
 def render_ventas(df_v, df_u, df_cl, df_vd, conn, URL_SHEET, fmt_moneda):
     st.title("📝 Gestión de Ventas")
@@ -12,18 +21,32 @@ def render_ventas(df_v, df_u, df_cl, df_vd, conn, URL_SHEET, fmt_moneda):
     # ---------------------------------------------------------
     with tab_nueva:
         st.subheader("Registrar Contrato Nuevo")
-        lotes_libres = df_u[df_u["estatus"] == "Disponible"]["ubicacion"].tolist()
+        indice_inv = obtener_indice_inventario(df_u, URL_SHEET)
+        fases_libres = fases_disponibles(indice_inv)
         
-        if not lotes_libres:
+        if not fases_libres:
             st.warning("No hay lotes disponibles en el inventario.")
         else:
-            f_lote = st.selectbox("📍 Seleccione Lote a Vender", ["--"] + lotes_libres, key="nv_lote")
+            # Búsqueda guiada: Fase -> Manzana -> Lote (solo disponibles, desde el índice)
+            cl1, cl2, cl3 = st.columns(3)
+            f_fase = cl1.selectbox("🏗️ Fase", fases_libres, key="nv_fase")
+            manzanas_libres = manzanas_disponibles(indice_inv, f_fase)
+            f_manzana = cl2.selectbox(
+                "🍎 Manzana", manzanas_libres, key="nv_manzana",
+                format_func=lambda m: f"M{str(m).zfill(2)} ({len(lotes_disponibles(indice_inv, f_fase, m))} libres)"
+            )
+            lotes_libres = lotes_disponibles(indice_inv, f_fase, f_manzana)
+            f_lote = cl3.selectbox("📍 Lote a Vender", ["--"] + lotes_libres, key="nv_lote")
             
             if f_lote != "--":
                 row_u = df_u[df_u["ubicacion"] == f_lote].iloc[0]
                 costo_base = float(row_u.get('precio', row_u.get('costo', 0.0)))
                 st.info(f"💰 Costo de Lista para {f_lote}: {fmt_moneda(costo_base)}")
 
+                # Búsqueda de cliente fuera del formulario para que los resultados se actualicen al escribir
+                indice_cli = obtener_indice_clientes(df_cl, URL_SHEET)
+                consulta_cli = st.text_input("🔍 Buscar cliente (nombre, teléfono o correo)", key="nv_buscar_cli")
+
                 with st.form("form_nueva_venta_modular"):
                     c1, c2 = st.columns(2)
                     f_fec = c1.date_input("📅 Fecha de Contrato", value=datetime.now())
@@ -34,10 +57,14 @@ def render_ventas(df_v, df_u, df_cl, df_vd, conn, URL_SHEET, fmt_moneda):
                     f_vende_nuevo = col_v2.text_input("🆕 Nuevo Vendedor")
                     
                     st.write("👤 **Información del Cliente**")
-                    clientes_list = ["-- SELECCIONAR --"] + (df_cl["nombre"].tolist() if not df_cl.empty else [])
+                    if consulta_cli:
+                        clientes_list = ["-- SELECCIONAR --"] + [r["nombre"] for r in buscar_clientes(indice_cli, consulta_cli)]
+                    else:
+                        clientes_list = ["-- SELECCIONAR --"] + (df_cl["nombre"].tolist() if not df_cl.empty else [])
                     col_c1, col_c2 = st.columns([2, 1])
                     f_cli_sel = col_c1.selectbox("Cliente Registrado", clientes_list)
                     f_cli_nuevo = col_c2.text_input("🆕 Nuevo Cliente")
+                    f_cli_confirmar = col_c2.checkbox("Registrar aunque exista un cliente similar")
                     
                     st.markdown("---")
                     st.write("💰 **Condiciones Financieras**")
@@ -48,9 +75,18 @@ def render_ventas(df_v, df_u, df_cl, df_vd, conn, URL_SHEET, fmt_moneda):
                     cf1_b, cf2_b = st.columns(2)
                     f_comision = cf1_b.number_input("Monto de Comisión ($)", min_value=0.0, value=0.0)
                     f_pla = cf2_b.number_input("🕒 Plazo en Meses", min_value=1, value=12)
+
+                    with st.expander("⚙️ Condiciones de Crédito (interés, gracia, pago final)"):
+                        ct1, ct2, ct3 = st.columns(3)
+                        f_tipo = ct1.selectbox("Tipo de Interés", TIPOS_INTERES)
+                        f_tasa = ct2.number_input("Tasa Anual (%)", min_value=0.0, value=0.0, step=0.5)
+                        f_gracia = ct3.number_input("Meses de Gracia", min_value=0, value=0)
+                        ct4, ct5 = st.columns(2)
+                        f_final = ct4.number_input("Pago Final / Globo ($)", min_value=0.0, value=0.0)
+                        f_recargo = ct5.number_input("Recargo por Mora (% de la cuota)", min_value=0.0, value=0.0, step=0.5)
                     
                     st.markdown("---")
-                    m_calc = (f_tot - f_eng) / f_pla if f_pla > 0 else 0
+                    m_calc = float(calcular_cuota(f_tot - f_eng, f_pla, f_tipo, f_tasa, f_gracia, f_final))
                     
                     col_met, col_btn = st.columns([2, 1])
                     col_met.metric("Mensualidad Resultante", fmt_moneda(m_calc))
@@ -64,34 +100,43 @@ def render_ventas(df_v, df_u, df_cl, df_vd, conn, URL_SHEET, fmt_moneda):
                         cliente_final = f_cli_nuevo if f_cli_nuevo else f_cli_sel
                         vendedor_final = f_vende_nuevo if f_vende_nuevo else f_vende_sel
                         
+                        duplicados = posibles_duplicados(indice_cli, f_cli_nuevo) if f_cli_nuevo else []
                         if cliente_final == "-- SELECCIONAR --" or not cliente_final:
                             st.error("❌ Error: Debe asignar un cliente.")
+                        elif not lote_disponible(conn, URL_SHEET, f_lote):
+                            st.error(f"❌ El lote {f_lote} ya no está disponible; se vendió o cambió de estatus. Elija otro.")
+                        elif duplicados and not f_cli_confirmar:
+                            aviso_duplicados(duplicados)
                         else:
                             if f_cli_nuevo:
-                                nid_c = int(df_cl["id_cliente"].max() + 1) if not df_cl.empty else 1
+                                nid_c = reservar_ids(conn, URL_SHEET, "clientes", df_cl, "id_cliente")
                                 nuevo_cli = pd.DataFrame([{"id_cliente": nid_c, "nombre": f_cli_nuevo, "telefono": "", "correo": ""}])
                                 df_cl = pd.concat([df_cl, nuevo_cli], ignore_index=True)
-                                conn.update(spreadsheet=URL_SHEET, worksheet="clientes", data=df_cl)
+                                guardar_hoja(conn, URL_SHEET, "clientes", df_cl)
                             
                             if f_vende_nuevo:
-                                nid_v = int(df_vd["id_vendedor"].max() + 1) if not df_vd.empty else 1
+                                nid_v = reservar_ids(conn, URL_SHEET, "vendedores", df_vd, "id_vendedor")
                                 nuevo_vd = pd.DataFrame([{"id_vendedor": nid_v, "nombre": f_vende_nuevo, "telefono": "", "comision_base": 0}])
                                 df_vd = pd.concat([df_vd, nuevo_vd], ignore_index=True)
-                                conn.update(spreadsheet=URL_SHEET, worksheet="vendedores", data=df_vd)
+                                guardar_hoja(conn, URL_SHEET, "vendedores", df_vd)
 
-                            nid_vta = int(df_v["id_venta"].max() + 1) if not df_v.empty else 1
+                            nid_vta = reservar_ids(conn, URL_SHEET, "ventas", df_v, "id_venta")
                             nueva_v = pd.DataFrame([{
                                 "id_venta": nid_vta, "fecha": f_fec.strftime('%Y-%m-%d'), "ubicacion": f_lote,
                                 "cliente": cliente_final, "vendedor": vendedor_final, "precio_total": f_tot,
                                 "enganche": f_eng, "plazo_meses": f_pla, "mensualidad": m_calc, 
-                                "comision": f_comision, "comentarios": f_coment, "estatus_pago": "Activo"
+                                "comision": f_comision, "comentarios": f_coment, "estatus_pago": "Activo",
+                                "tipo_interes": f_tipo, "tasa_anual": f_tasa, "meses_gracia": f_gracia,
+                                "pago_final": f_final, "recargo_mora": f_recargo
                             }])
+                            _, version_v = version_de(df_v)
                             df_v = pd.concat([df_v, nueva_v], ignore_index=True)
+                            _, version_u = version_de(df_u)
                             df_u.loc[df_u["ubicacion"] == f_lote, "estatus"] = "Vendido"
                             
-                            conn.update(spreadsheet=URL_SHEET, worksheet="ventas", data=df_v)
-                            conn.update(spreadsheet=URL_SHEET, worksheet="ubicaciones", data=df_u)
-                            st.success("✅ Venta registrada con éxito."); st.cache_data.clear(); st.rerun()
+                            aplicar_venta(URL_SHEET, version_v, guardar_hoja(conn, URL_SHEET, "ventas", df_v), nueva_v)
+                            actualizar_lote(URL_SHEET, version_u, guardar_hoja(conn, URL_SHEET, "ubicaciones", df_u), df_u, f_lote)
+                            st.success("✅ Venta registrada con éxito."); st.rerun()
 
     # ---------------------------------------------------------
     # PESTAÑA 2: EDITOR
@@ -126,8 +171,18 @@ def render_ventas(df_v, df_u, df_cl, df_vd, conn, URL_SHEET, fmt_moneda):
                     e1_b, e2_b = st.columns(2)
                     e_com = e1_b.number_input("Comisión ($)", min_value=0.0, value=float(datos_v.get("comision", 0.0)))
                     e_pla = e2_b.number_input("Plazo (Meses)", min_value=1, value=int(datos_v["plazo_meses"]))
+
+                    t = terminos_credito(df_v.loc[[datos_v.name]]).iloc[0]
+                    with st.expander("⚙️ Condiciones de Crédito (interés, gracia, pago final)"):
+                        et1, et2, et3 = st.columns(3)
+                        e_tipo = et1.selectbox("Tipo de Interés", TIPOS_INTERES, index=TIPOS_INTERES.index(t["tipo_interes"]))
+                        e_tasa = et2.number_input("Tasa Anual (%)", min_value=0.0, value=float(t["tasa_anual"]), step=0.5)
+                        e_gracia = et3.number_input("Meses de Gracia", min_value=0, value=int(t["meses_gracia"]))
+                        et4, et5 = st.columns(2)
+                        e_final = et4.number_input("Pago Final / Globo ($)", min_value=0.0, value=float(t["pago_final"]))
+                        e_recargo = et5.number_input("Recargo por Mora (% de la cuota)", min_value=0.0, value=float(t["recargo_mora"]), step=0.5)
                     
-                    e_mensu = (e_tot - e_eng) / e_pla
+                    e_mensu = float(calcular_cuota(e_tot - e_eng, e_pla, e_tipo, e_tasa, e_gracia, e_final))
                     st.metric("Nueva Mensualidad", fmt_moneda(e_mensu))
                     
                     if st.form_submit_button("💾 Guardar Cambios"):
@@ -137,9 +192,12 @@ def render_ventas(df_v, df_u, df_cl, df_vd, conn, URL_SHEET, fmt_moneda):
                         df_v.at[idx, "precio_total"], df_v.at[idx, "enganche"] = e_tot, e_eng
                         df_v.at[idx, "plazo_meses"], df_v.at[idx, "mensualidad"] = e_pla, e_mensu
                         df_v.at[idx, "comision"] = e_com
+                        df_v.at[idx, "tipo_interes"], df_v.at[idx, "tasa_anual"] = e_tipo, e_tasa
+                        df_v.at[idx, "meses_gracia"], df_v.at[idx, "pago_final"] = e_gracia, e_final
+                        df_v.at[idx, "recargo_mora"] = e_recargo
                         
-                        conn.update(spreadsheet=URL_SHEET, worksheet="ventas", data=df_v)
-                        st.success("¡Actualizado!"); st.cache_data.clear(); st.rerun()
+                        guardar_hoja(conn, URL_SHEET, "ventas", df_v)
+                        st.success("¡Actualizado!"); st.rerun()
 
     # ---------------------------------------------------------
     # PESTAÑA 3: HISTORIAL (FORMATO PROFESIONAL)